@@ -0,0 +1,252 @@
+import json
+import subprocess
+from contextlib import redirect_stdout
+from io import StringIO
+from random import Random
+from statistics import mean, median
+from time import perf_counter
+from django.conf import settings
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from base.request_metrics import instrument_storage, start_request_metrics, stop_request_metrics, record_query
+from moderation.models import ModerationStatus, PostDenialReason, fetch_post_moderate, stop_moderating
+from posts.models import (Post, PostTag, get_approved_posts, get_approved_posts_cursor, get_feed_cursor,
+                          get_post_search_vector, get_user_posts)
+from services.user_deleter import run_user_deleter
+from users.models import GroupUser
+
+UserModel = get_user_model()
+BENCH_PREFIX = 'bench'
+BENCH_PASSWORD = 'bench-password'
+TAGS = [f'tag{_}' for _ in range(500)]
+ANALYZE_TABLES = ['users_user', 'posts_post',
+                  'posts_posttag', 'moderation_moderationstatus']
+MODERATORS = 10
+
+
+def _chunks(total, size):
+    for start in range(0, total, size):
+        yield range(start, min(start + size, total))
+
+
+class Command(BaseCommand):
+    help = ('Seeds synthetic users, posts, tags and moderation history in a transaction that is rolled back, '
+            'times the hot query paths and prints the results as JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000)
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--tags-per-post', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='file the JSON is written to instead of stdout')
+
+    def handle(self, *args, **options):
+        self.rng = Random(options['seed'])
+        self.options = options
+        instrument_storage()
+
+        with transaction.atomic():
+            seed = self._seed()
+            self._analyze()
+            results = self._run()
+            transaction.set_rollback(True)
+
+        data = json.dumps({
+            'commit': self._get_commit(),
+            'created_at': timezone.now().isoformat(),
+            'seed': seed,
+            'results': results
+        }, indent=2)
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(data)
+        else:
+            print(data)
+
+    def _get_commit(self):
+        try:
+            return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                  cwd=settings.BASE_DIR, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def _log(self, message):
+        self.stderr.write(f'{timezone.now()}: {message}')
+
+    def _seed(self):
+        users, posts = self.options['users'], self.options['posts']
+        expired_users = max(1, users // 100)
+        self._log(f'Seeding {users} users...')
+        self.users = self._seed_users(users)
+        self.moderators = self.users[:MODERATORS]
+        self._seed_moderators()
+        self._log(f'Seeding {posts} posts...')
+        tags = self._seed_posts(posts)
+        self._log(f'Seeding {expired_users} not activated users...')
+        self._seed_users(expired_users, prefix=f'{BENCH_PREFIX}x', activated=False)
+        # delete requests are executed once the deletion interval is over
+        UserModel.objects.filter(id__in=[_.id for _ in self.users[-expired_users:]]).update(
+            delete_requested_at=timezone.now() - timezone.timedelta(days=365))
+        return {'users': users + expired_users, 'posts': posts, 'tags': tags,
+                'expired_users': expired_users, 'delete_requests': expired_users}
+
+    def _analyze(self):
+        # the planner would otherwise use the statistics of the tables before seeding
+        self._log('Analyzing tables...')
+
+        with connection.cursor() as cursor:
+            for table in ANALYZE_TABLES:
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(table)}')
+
+    def _seed_users(self, total, prefix=BENCH_PREFIX, activated=True):
+        password = make_password(BENCH_PASSWORD)
+        activated_at = timezone.now() if activated else None
+        users = []
+
+        for chunk in _chunks(total, self.options['batch_size']):
+            users += UserModel.objects.bulk_create([UserModel(
+                username=f'{prefix}{_}', email=f'{prefix}{_}@example.com', password=password,
+                login_id=UserModel.get_rand_id(), activated_at=activated_at) for _ in chunk])
+
+        if not activated:
+            expired_at = timezone.now() - timezone.timedelta(
+                seconds=settings.ACCOUNT_ACTIVATION_EXPIRATION_TIME + 60)
+            UserModel.objects.filter(id__in=[_.id for _ in users]).update(
+                created_at=expired_at)
+
+        return users
+
+    def _seed_moderators(self):
+        group = Group.objects.get_or_create(name='moderator')[0]
+        GroupUser.objects.bulk_create(
+            [GroupUser(user=_, group=group) for _ in self.moderators])
+        self.denial_reason = PostDenialReason.objects.create(
+            description='Benchmark denial reason')
+
+    def _get_post_status(self):
+        value = self.rng.random()
+
+        if value < 0.8:
+            return Post.APPROVED
+
+        return Post.DENIED if value < 0.9 else Post.WAITING_MODERATION
+
+    def _seed_posts(self, total):
+        now = timezone.now()
+        tags_count = 0
+
+        for chunk in _chunks(total, self.options['batch_size']):
+            posts = []
+
+            for index in chunk:
+                author = self.rng.choice(self.users)
+                post = Post(author=author, identifier=f'{BENCH_PREFIX}{index}',
+                            meme_file=f'{Post.MEMES_FOLDER}/{author.username}/{BENCH_PREFIX}{index}.jpg',
+                            moderation_status=self._get_post_status(),
+                            meme_labels=' '.join(sorted(self.rng.sample(TAGS, self.options['tags_per_post']))),
+                            meme_labelled=True)
+
+                if post.moderation_status == Post.APPROVED:
+                    post.approved_at = now - \
+                        timezone.timedelta(seconds=self.rng.randint(0, 365 * 24 * 60 * 60))
+
+                post.meme_search = f'{post.meme_text} {post.meme_labels} {author.username}'
+                post.search_vector = get_post_search_vector(post)
+                posts.append(post)
+
+            posts = Post.objects.bulk_create(posts)
+            tags = [PostTag(post=post, description=description)
+                    for post in posts for description in post.meme_labels.split()]
+            PostTag.objects.bulk_create(tags)
+            tags_count += len(tags)
+            ModerationStatus.objects.bulk_create([ModerationStatus(
+                post=post, result=post.moderation_status, moderator_result=self.rng.choice(self.moderators),
+                denial_reason=self.denial_reason if post.moderation_status == Post.DENIED else None)
+                for post in posts if post.moderation_status != Post.WAITING_MODERATION])
+
+        return tags_count
+
+    def _measure(self, func, repeat=None, setup=None, teardown=None):
+        timings, queries, sql_timings, storage_calls = [], [], [], []
+
+        for _ in range(repeat or self.options['repeat']):
+            args = setup() if setup else ()
+            metrics = start_request_metrics()
+            start = perf_counter()
+
+            try:
+                with connection.execute_wrapper(record_query):
+                    func(*args)
+            finally:
+                stop_request_metrics()
+
+            timings.append((perf_counter() - start) * 1000)
+            queries.append(metrics['queries'])
+            sql_timings.append(metrics['sql_ms'])
+            storage_calls.append(metrics['storage_calls'])
+
+            if teardown:
+                teardown(*args)
+
+        return {
+            'repeat': len(timings),
+            'min_ms': round(min(timings), 3),
+            'median_ms': round(median(timings), 3),
+            'mean_ms': round(mean(timings), 3),
+            'max_ms': round(max(timings), 3),
+            'per_second': round(1000 / mean(timings), 1),
+            'sql_ms': round(median(sql_timings), 3),
+            'queries': max(queries),
+            'storage_calls': max(storage_calls)
+        }
+
+    def _run(self):
+        author = UserModel.objects.filter(posts__isnull=False, username__startswith=BENCH_PREFIX).first()
+        user = self.users[len(self.users) // 2]
+        search = self.rng.choice(TAGS)
+        # same depth as the deep page, a keyset cursor should cost the same as the first page
+        deep_post = Post.objects.filter(moderation_status=Post.APPROVED, approved_at__isnull=False).order_by(
+            '-approved_at', '-id')[99 * settings.POSTS_PER_PAGE - 1:].first()
+        deep_cursor = get_feed_cursor(deep_post) if deep_post else None
+        results = {}
+        cases = {
+            'get_approved_posts': lambda: get_approved_posts(1, ''),
+            'get_approved_posts_deep_page': lambda: get_approved_posts(100, ''),
+            'get_approved_posts_search': lambda: get_approved_posts(1, search),
+            'get_approved_posts_cursor': lambda: get_approved_posts_cursor(None, ''),
+            'get_approved_posts_cursor_deep_page': lambda: get_approved_posts_cursor(deep_cursor, ''),
+            'get_approved_posts_author': lambda: get_approved_posts(1, '', author),
+            'get_user_posts': lambda: get_user_posts(author, 1),
+            'login_username': lambda: authenticate(username=user.username, password=BENCH_PASSWORD),
+            'login_email': lambda: authenticate(username=user.email, password=BENCH_PASSWORD),
+            # unknown identifiers skip the password hashing, so only the user lookup is timed
+            'login_lookup_username': lambda: authenticate(username=f'{BENCH_PREFIX}none', password=BENCH_PASSWORD),
+            'login_lookup_email': lambda: authenticate(username=f'{BENCH_PREFIX}none@example.com',
+                                                       password=BENCH_PASSWORD),
+        }
+
+        for name, func in cases.items():
+            self._log(f'Measuring {name}...')
+            results[name] = self._measure(func)
+
+        self._log('Measuring fetch_post_moderate...')
+        results['fetch_post_moderate'] = self._measure(
+            fetch_post_moderate,
+            setup=lambda: (UserModel.objects.get(id=self.rng.choice(self.moderators).id),),
+            teardown=lambda moderator: stop_moderating(UserModel.objects.get(id=moderator.id)))
+
+        # the sweep deletes the seeded users, so it runs once and last
+        self._log('Measuring run_user_deleter...')
+
+        with redirect_stdout(StringIO()):
+            results['run_user_deleter'] = self._measure(
+                run_user_deleter, repeat=1)
+
+        return results
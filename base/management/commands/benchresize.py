@@ -0,0 +1,46 @@
+import resource
+from io import BytesIO
+from multiprocessing import get_context
+from time import perf_counter
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from PIL import Image
+from base.utils import resized_img, validate_img_pixels
+
+
+def _resize(image_bytes, name, image_size):
+    image = SimpleUploadedFile(name, image_bytes)
+    start = perf_counter()
+    validate_img_pixels(image)
+    resized_img(image, image, image_size)
+    # ru_maxrss is in kilobytes on Linux
+    return perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class Command(BaseCommand):
+    help = 'Measures latency and peak RSS of the upload resize used by CreatePostForm and AccountForm'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--width', type=int, default=6000)
+        parser.add_argument('--height', type=int, default=4000)
+
+    def handle(self, *args, **options):
+        size = (options['width'], options['height'])
+        cases = [('CreatePostForm', settings.MEME_SIZE),
+                 ('AccountForm', settings.PROFILE_PIC_SIZE)]
+        # every run happens in a fresh process so peak RSS is not shared between them
+        context = get_context('fork')
+
+        for ext in ('JPEG', 'PNG'):
+            img_bytes = BytesIO()
+            Image.effect_noise(size, 64).convert(
+                'RGB').save(img_bytes, format=ext)
+
+            for form, image_size in cases:
+                with context.Pool(1) as pool:
+                    latency, max_rss = pool.apply(
+                        _resize, (img_bytes.getvalue(), f'image.{ext}', image_size))
+
+                print(f'{form} {ext} {size[0]}x{size[1]}: {latency * 1000:.1f} ms. '
+                      f'Peak RSS: {max_rss / 1024:.1f} MB')
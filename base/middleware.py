@@ -1,6 +1,10 @@
+from time import perf_counter
 from django.conf import settings
+from django.db import connection
 from django.http import HttpResponseNotAllowed
 from django.template.loader import render_to_string
+from .request_metrics import (instrument_storage, start_request_metrics, stop_request_metrics,
+                              record_query, add_request_sample)
 
 
 class HttpResponseNotAllowedMiddleware:
@@ -20,3 +24,33 @@ class HttpResponseNotAllowedMiddleware:
             response.content = render_to_string('errors/405.html', context)
 
         return response
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument_storage()
+
+    def __call__(self, request):
+        if not settings.REQUEST_METRICS:
+            return self.get_response(request)
+
+        metrics = start_request_metrics()
+        start = perf_counter()
+
+        try:
+            with connection.execute_wrapper(record_query):
+                response = self.get_response(request)
+        finally:
+            stop_request_metrics()
+
+        metrics['wall_ms'] = (perf_counter() - start) * 1000
+        response['Server-Timing'] = (f'db;dur={metrics["sql_ms"]:.2f};desc="{metrics["queries"]} queries", '
+                                     f'storage;desc="{metrics["storage_calls"]} calls", '
+                                     f'total;dur={metrics["wall_ms"]:.2f}')
+        resolver_match = request.resolver_match
+
+        if resolver_match and resolver_match.view_name:
+            add_request_sample(resolver_match.view_name, metrics)
+
+        return response
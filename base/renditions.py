@@ -0,0 +1,50 @@
+import os
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+
+def get_rendition_name(name, width):
+    root = os.path.splitext(name)[0]
+    return f'{root}.{width}w.webp'
+
+
+def create_renditions(name, widths):
+    with default_storage.open(name, 'rb') as file:
+        img = Image.open(file)
+        img.load()
+
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA')
+
+    created = []
+
+    for width in sorted({min(_, img.width) for _ in widths}):
+        rendition = img.copy()
+        rendition.thumbnail((width, img.height))
+        img_bytes = BytesIO()
+        rendition.save(img_bytes, format='WEBP',
+                       quality=settings.RENDITION_QUALITY)
+        rendition_name = get_rendition_name(name, width)
+
+        if default_storage.exists(rendition_name):
+            default_storage.delete(rendition_name)
+
+        default_storage.save(rendition_name, ContentFile(img_bytes.getvalue()))
+        created.append(width)
+
+    return created
+
+
+def delete_renditions(name, widths):
+    for width in widths or []:
+        rendition_name = get_rendition_name(name, width)
+
+        if default_storage.exists(rendition_name):
+            default_storage.delete(rendition_name)
+
+
+def get_srcset(name, widths):
+    return [f'{default_storage.url(get_rendition_name(name, width))} {width}w' for width in widths or []]
@@ -0,0 +1,119 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict, deque
+from functools import wraps
+from math import ceil
+from time import perf_counter
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+METRICS = ('queries', 'sql_ms', 'storage_calls', 'wall_ms')
+STORAGE_METHODS = ('delete', 'exists', 'listdir', 'open', 'save', 'size', 'url')
+
+_current = threading.local()
+_samples = defaultdict(lambda: deque(maxlen=settings.REQUEST_METRICS_WINDOW))
+_samples_lock = threading.Lock()
+
+
+def _get_current():
+    return getattr(_current, 'metrics', None)
+
+
+def start_request_metrics():
+    _current.metrics = {'queries': 0, 'sql_ms': 0,
+                        'storage_calls': 0, 'wall_ms': 0}
+    _current.storage_depth = 0
+    return _current.metrics
+
+
+def stop_request_metrics():
+    _current.metrics = None
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _get_current()
+    start = perf_counter()
+
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if metrics is not None:
+            metrics['queries'] += 1
+            metrics['sql_ms'] += (perf_counter() - start) * 1000
+
+
+def _counted_storage_method(method):
+    @wraps(method)
+    def _wrapped(*args, **kwargs):
+        if _get_current() is None:
+            return method(*args, **kwargs)
+
+        # storage methods call each other (save calls exists), only the outer call is counted
+        if not _current.storage_depth:
+            _current.metrics['storage_calls'] += 1
+
+        _current.storage_depth += 1
+
+        try:
+            return method(*args, **kwargs)
+        finally:
+            _current.storage_depth -= 1
+
+    _wrapped.counted_storage_method = True
+    return _wrapped
+
+
+def instrument_storage(storage=default_storage):
+    for name in STORAGE_METHODS:
+        method = getattr(storage, name)
+
+        if not getattr(method, 'counted_storage_method', False):
+            setattr(storage, name, _counted_storage_method(method))
+
+
+def add_request_sample(view_name, metrics):
+    with _samples_lock:
+        _samples[view_name].append(dict(metrics))
+
+
+def _percentile(values, percent):
+    return values[max(0, ceil(len(values) * percent) - 1)]
+
+
+def _get_histogram(values):
+    buckets = settings.REQUEST_METRICS_BUCKETS
+    labels = [f'<={_}' for _ in buckets] + [f'>{buckets[-1]}']
+    histogram = dict.fromkeys(labels, 0)
+
+    for value in values:
+        histogram[labels[bisect_left(buckets, value)]] += 1
+
+    return histogram
+
+
+def get_request_metrics():
+    with _samples_lock:
+        samples = {name: list(values) for name, values in _samples.items()}
+
+    data = {}
+
+    for name, values in sorted(samples.items()):
+        data[name] = {'count': len(values)}
+
+        for metric in METRICS:
+            metric_values = sorted(_[metric] for _ in values)
+            data[name][metric] = {
+                'p50': round(_percentile(metric_values, 0.5), 2),
+                'p95': round(_percentile(metric_values, 0.95), 2),
+                'max': round(metric_values[-1], 2)
+            }
+
+        data[name]['wall_ms']['histogram'] = _get_histogram(
+            [_['wall_ms'] for _ in values])
+
+    return data
+
+
+def reset_request_metrics():
+    with _samples_lock:
+        _samples.clear()
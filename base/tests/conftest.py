@@ -4,3 +4,21 @@ import pytest
 @pytest.fixture
 def invalid_url():
     return '/alnktraojesvaplnkrtinaeniraotnkrapln/'
+
+
+@pytest.fixture
+def valid_user_1():
+    return {
+        'username': 'TestUser',
+        'email': 'testuser@email.com',
+        'password': 'mvps8xa0'
+    }
+
+
+@pytest.fixture
+def valid_user_2():
+    return {
+        'username': 'user2',
+        'email': 'user2@email.com',
+        'password': 'mvps8xa0'
+    }
@@ -0,0 +1,24 @@
+import json
+from io import StringIO
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+UserModel = get_user_model()
+
+
+@pytest.mark.django_db
+def test_benchmark(tmp_path):
+    output = tmp_path / 'benchmark.json'
+    stderr = StringIO()
+    call_command('benchmark', '--users', '20', '--posts', '100', '--repeat', '2',
+                 '--output', str(output), stderr=stderr)
+    data = json.loads(output.read_text())
+    assert data['seed'] == {'users': 21, 'posts': 100, 'tags': 500,
+                            'expired_users': 1, 'delete_requests': 1}
+    assert data['results']['get_approved_posts']['repeat'] == 2
+    assert data['results']['fetch_post_moderate']['queries'] > 0
+    assert data['results']['run_user_deleter']['repeat'] == 1
+    assert not UserModel.objects.exists()
+    log = stderr.getvalue()
+    assert log.index('Analyzing tables') < log.index('Measuring')
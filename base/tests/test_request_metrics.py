@@ -0,0 +1,59 @@
+import json
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from posts.tests.test_utils import create_test_post
+from users.tests.test_utils import create_test_user, create_admin_test_user
+from ..request_metrics import get_request_metrics, reset_request_metrics
+
+
+@pytest.fixture
+def request_metrics(settings):
+    settings.REQUEST_METRICS = True
+    reset_request_metrics()
+    cache.clear()
+    yield
+    reset_request_metrics()
+
+
+@pytest.mark.django_db
+def test_server_timing(client, request_metrics, valid_user_1):
+    user = create_test_user(valid_user_1, is_active=True)
+    create_test_post(user, 'image.PNG')
+    response = client.get(reverse('posts:user-posts') + '?page=1')
+    assert response.status_code == 302
+    client.force_login(user)
+    response = client.get(reverse('posts:user-posts') + '?page=1')
+    assert response.status_code == 200
+    timing = response['Server-Timing']
+    assert timing.startswith('db;dur=')
+    assert 'storage;desc="1 calls"' in timing
+    assert ';dur=' in timing.split('total')[1]
+    metrics = get_request_metrics()['posts:user-posts']
+    assert metrics['count'] == 2
+    assert metrics['queries']['p50'] == 0
+    assert metrics['queries']['max'] > 0
+    assert sum(metrics['wall_ms']['histogram'].values()) == 2
+
+
+def test_disabled(client, settings):
+    settings.REQUEST_METRICS = False
+    reset_request_metrics()
+    response = client.get(reverse('posts:home'))
+    assert 'Server-Timing' not in response
+    assert get_request_metrics() == {}
+
+
+@pytest.mark.django_db
+def test_dump_staff_only(client, request_metrics, valid_user_1, valid_user_2):
+    url = reverse('request-metrics')
+    client.get(url)
+    client.force_login(create_test_user(valid_user_1, is_active=True))
+    assert client.get(url).status_code == 403
+    client.force_login(create_admin_test_user(valid_user_2))
+    response = client.get(url)
+    assert response.status_code == 200
+    data = json.loads(response.content.decode('utf-8'))
+    assert data['request-metrics']['count'] == 2
+    assert set(data['request-metrics']) == {
+        'count', 'queries', 'sql_ms', 'storage_calls', 'wall_ms'}
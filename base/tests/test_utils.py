@@ -0,0 +1,37 @@
+from io import BytesIO
+import pytest
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+from ..utils import resized_img, validate_img_pixels
+
+
+def create_test_image(size, ext):
+    img_bytes = BytesIO()
+    Image.new('RGB', size, 'white').save(img_bytes, format=ext)
+    return SimpleUploadedFile(f'image.{ext}', img_bytes.getvalue())
+
+
+def test_validate_img_pixels(settings):
+    image = create_test_image((300, 200), 'PNG')
+    settings.MAX_IMAGE_PIXELS = 300 * 200
+    validate_img_pixels(image)
+    assert image.tell() == 0
+    settings.MAX_IMAGE_PIXELS = 300 * 200 - 1
+
+    with pytest.raises(ValidationError):
+        validate_img_pixels(image)
+
+
+@pytest.mark.parametrize('ext', ['JPEG', 'PNG'])
+def test_resized_img(settings, ext):
+    settings.TEST_MODE = False
+    settings.IMAGE_SPOOL_MAX_SIZE = 10
+    image = create_test_image((2000, 1000), ext)
+    resized_img(image, image, (500, 700))
+    assert image.file._rolled
+    image.seek(0)
+
+    with Image.open(image) as img:
+        assert img.size == (500, 250)
+        assert img.format == ext
@@ -1,4 +1,5 @@
-from itsdangerous import URLSafeTimedSerializer
+from itsdangerous import URLSafeSerializer, URLSafeTimedSerializer
 from django.conf import settings
 
+url_serializer = URLSafeSerializer(settings.SECRET_KEY)
 url_timed_serializer = URLSafeTimedSerializer(settings.SECRET_KEY)
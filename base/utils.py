@@ -1,5 +1,6 @@
-from io import BytesIO
+from tempfile import SpooledTemporaryFile
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from PIL import Image
 
 
@@ -7,15 +8,32 @@ def inverse_case(text):
     return ''.join(c.lower() if c.isupper() else c.upper() for c in text)
 
 
+def validate_img_pixels(image):
+    # only the header is read here, the pixels are decoded later by resized_img
+    image.seek(0)
+
+    with Image.open(image) as img:
+        width, height = img.size
+
+    image.seek(0)
+
+    if width * height > settings.MAX_IMAGE_PIXELS:
+        raise ValidationError(
+            f'Image too large: {width}x{height} pixels. Max allowed: {settings.MAX_IMAGE_PIXELS} pixels.')
+
+
 def resized_img(image, file_object, image_size):
     if settings.TEST_MODE:
         return
 
+    image.seek(0)
     img = Image.open(image)
+
+    # thumbnail() calls img.draft() first, so JPEGs are decoded straight to a reduced scale
     img.thumbnail(image_size)
-    img_bytes = BytesIO()
+    img_file = SpooledTemporaryFile(max_size=settings.IMAGE_SPOOL_MAX_SIZE)
     ext = image.name.split('.')[-1]
     ext = 'JPEG' if ext.lower() == 'jpg' else ext
-    img.save(img_bytes, format=ext)
-    file_object.file = img_bytes
-    file_object.size = img_bytes.tell()
+    img.save(img_file, format=ext)
+    file_object.file = img_file
+    file_object.size = img_file.tell()
@@ -1,9 +1,12 @@
 from itsdangerous.exc import SignatureExpired
 from django.shortcuts import render
 from django.contrib import messages
-from django.core.exceptions import NON_FIELD_ERRORS
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import NON_FIELD_ERRORS, PermissionDenied
+from django.http import JsonResponse
 from django.http.response import HttpResponseRedirect
 from django.views.generic.edit import ProcessFormView
+from .request_metrics import get_request_metrics
 
 
 def error_403(request, exception):
@@ -14,6 +17,14 @@ def error_404(request, exception):
     return render(request, 'errors/404.html', {'title': 'Page Not Found'}, status=404)
 
 
+@login_required
+def request_metrics(request):
+    if not request.user.is_staff:
+        raise PermissionDenied()
+
+    return JsonResponse(get_request_metrics())
+
+
 def _add_form_errors(form, errors):
     for field in form:
         while field.errors:
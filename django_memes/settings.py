@@ -40,6 +40,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'base.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -51,6 +52,10 @@ MIDDLEWARE = [
     'base.middleware.HttpResponseNotAllowedMiddleware'
 ]
 
+REQUEST_METRICS = env.bool('REQUEST_METRICS', False)
+REQUEST_METRICS_WINDOW = 500  # latest requests kept per url name
+REQUEST_METRICS_BUCKETS = [10, 50, 100, 250, 500, 1000]  # wall time histogram, in ms
+
 ROOT_URLCONF = 'django_memes.urls'
 
 TEMPLATES = [
@@ -84,6 +89,14 @@ DATABASES = {
     'default': env.db('DATABASE_URL'),
 }
 
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+USER_GROUPS_CACHE_TIMEOUT = env.int('USER_GROUPS_CACHE_TIMEOUT', 0)
+USER_CACHE_TIMEOUT = env.int('USER_CACHE_TIMEOUT', 0)
+USER_CACHE_GROUP_NAMES = True  # cached users carry their group names
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -127,14 +140,27 @@ VALID_PROFILE_PIC_FILETYPES = ['jpg', 'jpeg', 'png']
 VALID_MEME_FILETYPES = ['jpg', 'jpeg', 'png']
 PROFILE_PIC_SIZE = (256, 256)
 MEME_SIZE = (500, 700)
+MEME_RENDITION_WIDTHS = [250, 500]
+PROFILE_PIC_RENDITION_WIDTHS = [64, 128]
+RENDITION_QUALITY = 80  # WebP quality of the renditions
+MAX_IMAGE_PIXELS = 50 * 1000 * 1000  # checked from the header before decoding
+IMAGE_SPOOL_MAX_SIZE = 1024 * 1024  # resized images above 1 MB go to a temp file
+ASYNC_POST_INGESTION = env.bool('ASYNC_POST_INGESTION', False)
 
 MIN_MAX_CONSECUTIVE_POSTS = 2
 MAX_MAX_CONSECUTIVE_POSTS = 100
 POST_WAITING_INTERVAL = 1 * 60 * 60  # 1 hour
 POSTS_PER_PAGE = 5
+FEED_CACHE_TIMEOUT = 5 * 60  # 5 minutes
+VISION_BATCH_SIZE = 16  # images per batch_annotate_images request
+LABEL_PENDING_POSTS_MAX = 160
+LABEL_POST_ATTEMPTS = 3
+LABEL_POST_RETRY_INTERVAL = 60 * 60  # 1 hour
 DATE_TIME_DISPLAY_FORMAT = '%d %b %Y, %H:%M'
+DATE_TIME_DISPLAY_SQL_FORMAT = 'DD Mon YYYY, HH24:MI'  # DATE_TIME_DISPLAY_FORMAT for to_char
 USER_TEMPORARY_BAN = 24 * 60 * 60  # 24 hours
 USER_PERM_BAN_COUNT = 3
+MODERATION_BATCH_SIZE = 10
 
 LOGIN_URL = '/login/'
 AUTH_USER_MODEL = 'users.User'
@@ -142,6 +168,7 @@ ACCOUNT_ACTIVATION_EXPIRATION_TIME = 2 * 60 * 60  # 2 hours
 RESET_PASSWORD_EXPIRATION_TIME = 15 * 60  # 15 minutes
 CHANGE_EMAIL_EXPIRATION_TIME = 15 * 60  # 15 minutes
 ACCOUNT_DELETION_INTERVAL = 48 * 60 * 60  # 48 hours
+USER_DELETER_CHUNK_SIZE = 500
 
 TEST_MODE = False
 TEST_RUNNER = 'base.runner.PytestTestRunner'
@@ -151,6 +178,20 @@ CELERY_RESULT_BACKEND = 'django-db'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
+CELERY_BEAT_SCHEDULE = {
+    'delete-users': {
+        'task': 'services.tasks.delete_users',
+        'schedule': 5 * 60  # 5 minutes
+    },
+    'send-pending-emails': {
+        'task': 'emails.tasks.send_pending_emails',
+        'schedule': 30  # 30 seconds
+    },
+    'label-pending-posts': {
+        'task': 'posts.tasks.label_pending_posts',
+        'schedule': 60  # 1 minute
+    }
+}
 
 EMAIL_HOST = env('EMAIL_HOST')
 EMAIL_PORT = env.int('EMAIL_PORT', 587)
@@ -160,3 +201,4 @@ EMAIL_USE_TLS = env.bool('EMAIL_USE_TLS', False)
 EMAIL_USE_SSL = env.bool('EMAIL_USE_SSL', False)
 EMAIL_FROM = APP_NAME + ' noreply@djangomemes.com'
 EMAIL_TEST_USER = env('EMAIL_TEST_USER')
+EMAIL_BATCH_SIZE = 50
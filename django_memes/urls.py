@@ -4,6 +4,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import RedirectView
 from django.contrib.auth.decorators import login_required
+from base import views as base_views
 from users import views as user_views
 
 admin.autodiscover()
@@ -13,6 +14,8 @@ urlpatterns = [
     path('admin/logout/', user_views.logout),
     path('admin/login/', RedirectView.as_view(url=settings.LOGIN_URL,
                                               permanent=True, query_string=True)),
+    path('admin/request-metrics/', base_views.request_metrics,
+         name='request-metrics'),
     path('admin/', admin.site.urls),
     path('', include('users.urls')),
     path('', include('posts.urls')),
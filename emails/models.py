@@ -1,13 +1,11 @@
 from num2words import num2words
 from urllib.parse import urljoin
 from django.db import models
-from django.db.models.signals import post_save
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.template.loader import render_to_string
 from base.url_serializer import url_timed_serializer
-from .tasks import send_email
 
 UserModel = get_user_model()
 
@@ -34,14 +32,6 @@ def get_token_from_email(email, url_name):
     return url_timed_serializer.dumps(email, salt=url_name)
 
 
-def __send_saved_email(sender, instance, created, **kwargs):
-    if settings.TEST_MODE:
-        return
-
-    if not instance.sent:
-        send_email.delay(instance.id)
-
-
 def create_activation_email(user):
     token = get_token_from_email(user.email, 'account-activation')
     link = urljoin(settings.SITE_URL, reverse(
@@ -150,6 +140,3 @@ def create_ban_alert_email(moderation_status):
     body = render_to_string('emails/ban_alert.html', context)
     email = Email(subject='Ban Alert', body=body, recipient=user)
     email.save()
-
-
-post_save.connect(__send_saved_email, sender=Email)
@@ -2,8 +2,9 @@ from enum import Enum
 from celery import shared_task
 from celery.utils.log import get_task_logger
 from django.conf import settings
+from django.db import transaction
 from django.utils.html import strip_tags
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives, get_connection
 
 logger = get_task_logger(__name__)
 
@@ -12,31 +13,80 @@ class SendEmailResponses(Enum):
     SUCCESS = 0
     EMAIL_NOT_FOUND = 1
     EMAIL_ALREADY_SENT = 2
+    EMAIL_BEING_SENT = 3
+
+
+def _claim_pending_emails():
+    from .models import Email
+    # rows locked by another worker are being sent and are skipped
+    return Email.objects.select_for_update(skip_locked=True, of=('self',)).filter(
+        sent=False).select_related('recipient').order_by('created_at')
+
+
+def _set_emails_sent(emails):
+    from .models import Email
+    Email.objects.filter(id__in=[_.id for _ in emails]).update(sent=True)
 
 
 @shared_task(autoretry_for=(Exception,), retry_kwargs={'max_retries': 10}, default_retry_delay=5 * 60)
 def send_email(id):
     from .models import Email
-    email = Email.objects.filter(id=id).first()
 
-    if not email:
-        logger.info(f'Email with id {id} not found...')
-        return SendEmailResponses.EMAIL_NOT_FOUND.name
+    with transaction.atomic():
+        email = _claim_pending_emails().filter(id=id).first()
+
+        if not email:
+            email = Email.objects.filter(id=id).first()
+
+            if not email:
+                logger.info(f'Email with id {id} not found...')
+                return SendEmailResponses.EMAIL_NOT_FOUND.name
+
+            if email.sent:
+                logger.info(f'Email with id {id} already sent...')
+                return SendEmailResponses.EMAIL_ALREADY_SENT.name
+
+            logger.info(f'Email with id {id} being sent...')
+            return SendEmailResponses.EMAIL_BEING_SENT.name
 
-    if email.sent:
-        logger.info(f'Email with id {id} already sent...')
-        return SendEmailResponses.EMAIL_ALREADY_SENT.name
+        logger.info(f'Sending email with id {id}...')
+        message = _get_email_message(email)
+        message.send()
+        _set_emails_sent([email])
 
-    plain_message = strip_tags(email.body)
-    logger.info(f'Sending email with id {id}...')
+    return ', '.join(message.to)
 
+
+def _get_email_message(email, connection=None):
     if email.recipients:
         recipients = email.recipients.split(', ')
     else:
         recipients = [email.recipient.email]
 
-    send_mail(email.subject, plain_message, settings.EMAIL_FROM,
-              recipients, html_message=email.body)
-    email.sent = True
-    email.save()
-    return ', '.join(recipients)
+    message = EmailMultiAlternatives(email.subject, strip_tags(email.body), settings.EMAIL_FROM,
+                                     recipients, connection=connection)
+    message.attach_alternative(email.body, 'text/html')
+    return message
+
+
+@shared_task(autoretry_for=(Exception,), retry_kwargs={'max_retries': 10}, default_retry_delay=5 * 60)
+def send_pending_emails():
+    total = 0
+
+    with get_connection() as connection:
+        while True:
+            with transaction.atomic():
+                emails = list(_claim_pending_emails()[
+                              :settings.EMAIL_BATCH_SIZE])
+
+                if not emails:
+                    break
+
+                connection.send_messages(
+                    [_get_email_message(_, connection) for _ in emails])
+                _set_emails_sent(emails)
+
+            logger.info(f'{len(emails)} emails sent...')
+            total += len(emails)
+
+    return total
@@ -1,9 +1,14 @@
 import pytest
+from threading import Event, Thread
 from smtplib import SMTPRecipientsRefused
 from django.conf import settings
+from django.core import mail
+from django.db import connection, transaction
 from django.test.utils import override_settings
 from .test_utils import create_email_test_user
-from ..tasks import send_email, SendEmailResponses
+from .. import tasks
+from ..models import Email
+from ..tasks import send_email, send_pending_emails, SendEmailResponses
 
 
 def get_test_user(user_data):
@@ -83,3 +88,75 @@ def test_send_email_already_sent(valid_user_1):
     assert response == SendEmailResponses.EMAIL_ALREADY_SENT.name
     email = user.emails.first()
     assert email.sent
+
+
+@pytest.mark.django_db
+@override_settings(EMAIL_BATCH_SIZE=2)
+def test_send_pending_emails(monkeypatch, valid_user_1, valid_username1, valid_email2, valid_password1):
+    user1, email1 = get_test_user(valid_user_1)
+    user2, email2 = get_test_user(
+        {'username': f'{valid_username1}2', 'email': valid_email2, 'password': valid_password1})
+    email3 = Email(subject='Test', body='<p>Test</p>', recipient=user1,
+                   recipients=f'{settings.EMAIL_TEST_USER}, {valid_email2}')
+    email3.save()
+    connections = []
+
+    def get_connection(*args, **kwargs):
+        connections.append(mail.get_connection(*args, **kwargs))
+        return connections[-1]
+
+    monkeypatch.setattr(tasks, 'get_connection', get_connection)
+    mail.outbox = []
+    assert send_pending_emails() == 3
+    assert len(connections) == 1
+    assert [_.to for _ in mail.outbox] == [
+        [user1.email], [user2.email], [settings.EMAIL_TEST_USER, valid_email2]]
+    assert mail.outbox[2].body == 'Test'
+    assert mail.outbox[2].alternatives == [('<p>Test</p>', 'text/html')]
+    assert not Email.objects.filter(sent=False).exists()
+    assert send_pending_emails() == 0
+    assert len(mail.outbox) == 3
+
+
+@pytest.mark.django_db
+def test_send_email_then_pending(valid_user_1):
+    user, email = get_test_user(valid_user_1)
+    mail.outbox = []
+    assert send_email(email.id) == user.email
+    assert send_pending_emails() == 0
+    assert len(mail.outbox) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_send_email_being_sent(valid_user_1):
+    user, email = get_test_user(valid_user_1)
+    locked, release = Event(), Event()
+
+    def send_pending():
+        try:
+            with transaction.atomic():
+                list(tasks._claim_pending_emails())
+                locked.set()
+                release.wait(10)
+        finally:
+            connection.close()
+
+    thread = Thread(target=send_pending)
+    thread.start()
+    locked.wait(10)
+    mail.outbox = []
+
+    try:
+        assert send_email(email.id) == SendEmailResponses.EMAIL_BEING_SENT.name
+        assert send_pending_emails() == 0
+    finally:
+        release.set()
+        thread.join()
+
+    assert not mail.outbox
+    assert not Email.objects.get(id=email.id).sent
+
+
+def test_send_pending_emails_scheduled():
+    assert any(_['task'] == 'emails.tasks.send_pending_emails'
+               for _ in settings.CELERY_BEAT_SCHEDULE.values())
@@ -1,7 +1,8 @@
 from django import forms
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from .models import ModerationStatus, get_denial_reasons_moderator, ban_post_denied_author
+from .models import (ModerationStatus, get_denial_reasons_moderator, ban_post_denied_author, moderate_posts_batch,
+                     stop_moderating_batch)
 
 
 class DenyPostForm(forms.ModelForm):
@@ -44,3 +45,64 @@ class DenyPostForm(forms.ModelForm):
             ban_post_denied_author(status)
 
         return status
+
+
+class BatchModerateForm(forms.Form):
+    DECISIONS = [
+        ('', 'Skip'),
+        (ModerationStatus.APPROVED, 'Approve'),
+        (ModerationStatus.DENIED, 'Deny')
+    ]
+
+    def __init__(self, user, posts, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+        self.posts = posts
+        self.reasons = {
+            str(_.id): _ for _ in get_denial_reasons_moderator(user)}
+        reason_choices = [('', '---------')] + \
+            [(id_, reason.description) for id_, reason in self.reasons.items()]
+
+        for post in posts:
+            self.fields[f'decision_{post.identifier}'] = forms.ChoiceField(
+                choices=self.DECISIONS, required=False, label='Decision')
+            self.fields[f'denial_reason_{post.identifier}'] = forms.ChoiceField(
+                choices=reason_choices, required=False, label='Denial reason')
+            self.fields[f'denial_detail_{post.identifier}'] = forms.CharField(
+                required=False, label='Denial detail', widget=forms.Textarea(attrs={'rows': 2}))
+
+    def post_fields(self):
+        for post in self.posts:
+            yield (post, self[f'decision_{post.identifier}'], self[f'denial_reason_{post.identifier}'],
+                   self[f'denial_detail_{post.identifier}'])
+
+    def clean(self):
+        cleaned_data = super().clean()
+
+        for post in self.posts:
+            if cleaned_data.get(f'decision_{post.identifier}') == ModerationStatus.DENIED and \
+                    not cleaned_data.get(f'denial_reason_{post.identifier}'):
+                self.add_error(f'denial_reason_{post.identifier}',
+                               'Denial reason must be informed.')
+
+        return cleaned_data
+
+    def save(self):
+        decisions = []
+        skipped = []
+
+        for post in self.posts:
+            result = self.cleaned_data.get(f'decision_{post.identifier}')
+
+            if result == ModerationStatus.APPROVED:
+                decisions.append((post, result, None, None))
+            elif result == ModerationStatus.DENIED:
+                decisions.append((post, result, self.reasons[self.cleaned_data.get(f'denial_reason_{post.identifier}')],
+                                  self.cleaned_data.get(f'denial_detail_{post.identifier}') or None))
+            else:
+                skipped.append(post)
+
+        total = moderate_posts_batch(self.user, decisions)
+        # skipped posts go back to the queue for other moderators
+        stop_moderating_batch(self.user, skipped)
+        return total
@@ -1,5 +1,6 @@
-from django.db import models
-from django.db.models import Q
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest, Least
 from django.db.models.signals import post_save, post_delete, pre_delete
 from django.conf import settings
 from django.core.exceptions import ValidationError
@@ -7,8 +8,10 @@ from django.contrib.auth import get_user_model
 from django.http import Http404
 from django.core.validators import MinLengthValidator
 from django.utils import timezone
-from posts.models import Post
+from posts.models import Post, PostTag
+from posts.feed_cache import invalidate_feed
 from emails.models import create_ban_alert_email
+from users.models import invalidate_cached_users
 
 UserModel = get_user_model()
 
@@ -161,6 +164,13 @@ def check_post_moderating(moderator, identifier):
     return post
 
 
+def _get_posts_waiting_moderation():
+    now = timezone.now()
+    return Post.objects.select_for_update(skip_locked=True, of=('self',)).filter(
+        Q(moderation_status=Post.WAITING_MODERATION), Q(meme_processed=True), Q(author__banned=False), Q(
+            author__banned_until__isnull=True) | Q(author__banned_until__lte=now)).order_by('created_at')
+
+
 def fetch_post_moderate(moderator):
     if not moderator.is_moderator:
         return None
@@ -170,16 +180,16 @@ def fetch_post_moderate(moderator):
     if post:
         return post
 
-    now = timezone.now()
-    post = Post.objects.filter(Q(moderation_status=Post.WAITING_MODERATION), Q(author__banned=False), Q(
-        author__banned_until__isnull=True) | Q(author__banned_until__lte=now)).order_by('created_at').first()
+    with transaction.atomic():
+        post = _get_posts_waiting_moderation().first()
 
-    if not post:
-        return None
+        if not post:
+            return None
+
+        status = ModerationStatus(
+            post=post, moderator_moderating=moderator, moderator_result=moderator)
+        status.save()
 
-    status = ModerationStatus(
-        post=post, moderator_moderating=moderator, moderator_result=moderator)
-    status.save()
     return post
 
 
@@ -198,6 +208,87 @@ def approve_post(moderator, identifier):
     status.save()
 
 
+def _get_posts_moderating_batch(moderator):
+    return Post.objects.filter(moderation_status=Post.MODERATING, status__result=ModerationStatus.MODERATING,
+                               status__moderator_result=moderator, status__moderator_moderating__isnull=True)
+
+
+def get_posts_moderating_batch(moderator):
+    return list(_get_posts_moderating_batch(moderator).select_related('author').order_by('created_at'))
+
+
+def fetch_posts_moderate_batch(moderator, size=None):
+    if not moderator.is_moderator:
+        return []
+
+    posts = get_posts_moderating_batch(moderator)
+
+    if posts:
+        return posts
+
+    with transaction.atomic():
+        posts = list(_get_posts_waiting_moderation().select_related(
+            'author')[:size or settings.MODERATION_BATCH_SIZE])
+        ModerationStatus.objects.bulk_create(
+            [ModerationStatus(post=post, moderator_result=moderator) for post in posts])
+        Post.objects.filter(id__in=[post.id for post in posts]).update(
+            moderation_status=Post.MODERATING)
+
+    for post in posts:
+        post.moderation_status = Post.MODERATING
+
+    return posts
+
+
+def moderate_posts_batch(moderator, decisions):
+    # decisions: list of (post, result, denial_reason, denial_detail) on posts claimed in batch
+    with transaction.atomic():
+        claimed = set(_get_posts_moderating_batch(moderator).select_for_update(of=('self',)).filter(
+            id__in=[decision[0].id for decision in decisions]).values_list('id', flat=True))
+        decisions = [_ for _ in decisions if _[0].id in claimed]
+        ModerationStatus.objects.bulk_create([ModerationStatus(
+            post=post, result=result, moderator_result=moderator, denial_reason=reason, denial_detail=detail)
+            for post, result, reason, detail in decisions])
+        approved = [_[0] for _ in decisions if _[1] == ModerationStatus.APPROVED]
+        denied = [_[0] for _ in decisions if _[1] == ModerationStatus.DENIED]
+        Post.objects.filter(id__in=[post.id for post in approved]).update(
+            moderation_status=Post.APPROVED, approved_at=timezone.now())
+        Post.objects.filter(id__in=[post.id for post in denied]).update(
+            moderation_status=Post.DENIED, approved_at=None, meme_labelled=False, meme_text=None,
+            meme_label_attempts=0, meme_label_attempted_at=None)
+        PostTag.objects.filter(post__in=denied).delete()
+        intervals = {}
+
+        for post in approved:
+            intervals[post.author_id] = intervals.get(post.author_id, 0) + 1
+
+        for post in denied:
+            intervals[post.author_id] = intervals.get(post.author_id, 0) - 1
+
+        for author_id, change in intervals.items():
+            UserModel.objects.filter(id=author_id).update(max_posts_interval=Least(Greatest(
+                F('max_posts_interval') + change, settings.MIN_MAX_CONSECUTIVE_POSTS),
+                settings.MAX_MAX_CONSECUTIVE_POSTS))
+
+        invalidate_cached_users(list(intervals))
+
+    for author_id in {post.author_id for post in approved}:
+        invalidate_feed(author_id)
+
+    return len(decisions)
+
+
+def stop_moderating_batch(moderator, posts=None):
+    statuses = ModerationStatus.objects.filter(
+        result=ModerationStatus.MODERATING, moderator_result=moderator, moderator_moderating__isnull=True,
+        post__in=_get_posts_moderating_batch(moderator))
+
+    if posts is not None:
+        statuses = statuses.filter(post__in=[_.id for _ in posts])
+
+    statuses.delete()
+
+
 def get_denial_reasons_moderator(moderator):
     return PostDenialReason.objects.filter(
         Q(moderator=moderator) | Q(moderator__isnull=True)).extra(
@@ -218,7 +309,7 @@ def ban_post_denied_author(moderation_status):
         user.banned_until = timezone.now(
         ) + timezone.timedelta(seconds=settings.USER_TEMPORARY_BAN)
 
-    user.save()
+    user.save(update_fields=['temporary_bans', 'banned', 'banned_until', 'login_id'])
     create_ban_alert_email(moderation_status)
 
 
@@ -237,6 +328,8 @@ def __change_post_moderation_status(sender, instance, created, **kwargs):
     if instance.post.moderation_status != Post.APPROVED:
         instance.post.approve_post = None
         instance.post.meme_labelled = False
+        instance.post.meme_label_attempts = 0
+        instance.post.meme_label_attempted_at = None
         instance.post.meme_text = None
         instance.post.tags.all().delete()
 
@@ -267,19 +360,28 @@ def __change_post_moderation_status_back(sender, instance, **kwargs):
     instance.post.save()
 
 
+def __invalidate_post_feed(sender, instance, **kwargs):
+    if instance.result in (ModerationStatus.DENIED, ModerationStatus.APPROVED):
+        invalidate_feed(instance.post.author_id)
+
+
 def __remove_post_moderating_user_not_moderator(sender, instance, **kwargs):
     if not instance.user.is_moderator:
         stop_moderating(instance.user)
+        stop_moderating_batch(instance.user)
 
 
 def __remove_post_moderating_user_deleted(sender, instance, **kwargs):
     stop_moderating(instance)
+    stop_moderating_batch(instance)
 
 
 post_save.connect(__change_post_moderation_status, sender=ModerationStatus)
 post_save.connect(__clean_moderator_moderating, sender=ModerationStatus)
 post_delete.connect(__change_post_moderation_status_back,
                     sender=ModerationStatus)
+post_save.connect(__invalidate_post_feed, sender=ModerationStatus)
+post_delete.connect(__invalidate_post_feed, sender=ModerationStatus)
 post_delete.connect(__remove_post_moderating_user_not_moderator,
                     sender=UserModel.groups.through)
 pre_delete.connect(__remove_post_moderating_user_deleted, sender=UserModel)
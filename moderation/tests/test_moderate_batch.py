@@ -0,0 +1,155 @@
+import pytest
+from pytest_django.asserts import assertTemplateUsed
+from django.urls import reverse
+from posts.models import Post
+from ..models import (ModerationStatus, fetch_posts_moderate_batch, fetch_post_moderate,
+                      get_posts_moderating_batch, moderate_posts_batch)
+from .test_utils import (create_moderator_test_user, create_active_test_user,
+                         create_test_post, create_test_denial_reason)
+from users.models import User
+
+
+@pytest.mark.django_db
+def test_render_template(client, valid_user_1):
+    user = create_moderator_test_user(valid_user_1)
+    client.force_login(user)
+    response = client.get(reverse('moderation:moderate-batch'))
+    assert response.status_code == 200
+    assertTemplateUsed(response, 'moderation/moderate_batch.html')
+
+
+@pytest.mark.django_db
+def test_fetch_batch(settings, valid_user_1, valid_user_2, valid_image_file):
+    settings.MODERATION_BATCH_SIZE = 2
+    user1 = create_moderator_test_user(valid_user_1)
+    user2 = create_moderator_test_user(valid_user_2)
+    user3 = create_active_test_user(
+        {'username': 'author', 'email': 'author@email.com', 'password': valid_user_1['password']})
+    posts = [create_test_post(user3, valid_image_file) for _ in range(3)]
+    batch = fetch_posts_moderate_batch(user1)
+    assert batch == posts[:2]
+    assert fetch_posts_moderate_batch(user1) == posts[:2]
+    assert fetch_post_moderate(user2) == posts[2]
+    assert fetch_posts_moderate_batch(user2) == []
+    assert not fetch_posts_moderate_batch(user3)
+
+    for post in batch:
+        post.refresh_from_db()
+        assert post.moderation_status == Post.MODERATING
+
+
+@pytest.mark.django_db
+def test_moderate_batch(django_assert_max_num_queries, valid_user_1, valid_user_2, valid_image_file):
+    user1 = create_moderator_test_user(valid_user_1)
+    user2 = create_active_test_user(valid_user_2)
+    max_posts_interval = user2.max_posts_interval
+    reason = create_test_denial_reason('test denial reason', user1)
+    posts = [create_test_post(user2, valid_image_file) for _ in range(4)]
+    fetch_posts_moderate_batch(user1)
+
+    with django_assert_max_num_queries(8):
+        total = moderate_posts_batch(user1, [
+            (posts[0], ModerationStatus.APPROVED, None, None),
+            (posts[1], ModerationStatus.APPROVED, None, None),
+            (posts[2], ModerationStatus.DENIED, reason, 'detail'),
+        ])
+
+    assert total == 3
+    statuses = [Post.objects.get(id=_.id).moderation_status for _ in posts]
+    assert statuses == [Post.APPROVED, Post.APPROVED,
+                        Post.DENIED, Post.MODERATING]
+    assert Post.objects.get(id=posts[0].id).approved_at
+    assert ModerationStatus.objects.get(
+        post=posts[2], result=ModerationStatus.DENIED).denial_reason == reason
+    assert User.objects.get(
+        id=user2.id).max_posts_interval == max_posts_interval + 1
+    assert get_posts_moderating_batch(user1) == [posts[3]]
+    assert moderate_posts_batch(
+        user1, [(posts[0], ModerationStatus.DENIED, reason, None)]) == 0
+
+
+@pytest.mark.django_db
+def test_submit_batch(client, valid_user_1, valid_user_2, valid_image_file):
+    user1 = create_moderator_test_user(valid_user_1)
+    user2 = create_active_test_user(valid_user_2)
+    reason = create_test_denial_reason('test denial reason', user1)
+    posts = [create_test_post(user2, valid_image_file) for _ in range(2)]
+    client.force_login(user1)
+    url = reverse('moderation:moderate-batch')
+    client.get(url)
+    data = {
+        f'decision_{posts[0].identifier}': ModerationStatus.APPROVED,
+        f'decision_{posts[1].identifier}': ModerationStatus.DENIED,
+    }
+    response = client.post(url, data)
+    assert response.status_code == 302
+    assert response.url == url
+    assert Post.objects.get(
+        id=posts[1].id).moderation_status == Post.MODERATING
+    data[f'denial_reason_{posts[1].identifier}'] = reason.id
+    response = client.post(url, data, follow=True)
+    assert response.status_code == 200
+    assert 'messages' in response.context
+    assert [_.message for _ in response.context['messages']] == [
+        '2 post(s) moderated.']
+    assert [Post.objects.get(id=_.id).moderation_status for _ in posts] == [
+        Post.APPROVED, Post.DENIED]
+
+
+@pytest.mark.django_db
+def test_stop_batch(client, valid_user_1, valid_user_2, valid_image_file):
+    user1 = create_moderator_test_user(valid_user_1)
+    user2 = create_active_test_user(valid_user_2)
+    post = create_test_post(user2, valid_image_file)
+    client.force_login(user1)
+    client.get(reverse('moderation:moderate-batch'))
+    response = client.get(reverse('moderation:moderate-start'))
+    assert response.status_code == 302
+    assert response.url == reverse('moderation:moderate-batch')
+    response = client.get(reverse('moderation:moderate-batch-stop'))
+    assert response.status_code == 302
+    assert response.url == reverse('moderation:moderate-start')
+    assert Post.objects.get(
+        id=post.id).moderation_status == Post.WAITING_MODERATION
+    assert not ModerationStatus.objects.exists()
+
+
+@pytest.mark.django_db
+def test_skip_batch(client, valid_user_1, valid_user_2, valid_image_file):
+    user1 = create_moderator_test_user(valid_user_1)
+    user2 = create_active_test_user(valid_user_2)
+    posts = [create_test_post(user2, valid_image_file) for _ in range(2)]
+    client.force_login(user1)
+    url = reverse('moderation:moderate-batch')
+    client.get(url)
+    data = {f'decision_{posts[0].identifier}': ModerationStatus.APPROVED}
+    response = client.post(url, data)
+    assert response.status_code == 302
+    assert [Post.objects.get(id=_.id).moderation_status for _ in posts] == [
+        Post.APPROVED, Post.WAITING_MODERATION]
+    assert not get_posts_moderating_batch(user1)
+    assert not ModerationStatus.objects.filter(post=posts[1]).exists()
+
+
+@pytest.mark.django_db
+def test_remove_batch_user_not_moderator(valid_user_1, valid_user_2, valid_image_file):
+    user1 = create_moderator_test_user(valid_user_1)
+    user2 = create_active_test_user(valid_user_2)
+    post = create_test_post(user2, valid_image_file)
+    assert fetch_posts_moderate_batch(user1) == [post]
+    user1.groups.clear()
+    assert not ModerationStatus.objects.exists()
+    assert Post.objects.get(
+        id=post.id).moderation_status == Post.WAITING_MODERATION
+
+
+@pytest.mark.django_db
+def test_remove_batch_user_deleted(valid_user_1, valid_user_2, valid_image_file):
+    user1 = create_moderator_test_user(valid_user_1)
+    user2 = create_active_test_user(valid_user_2)
+    post = create_test_post(user2, valid_image_file)
+    assert fetch_posts_moderate_batch(user1) == [post]
+    user1.delete()
+    assert not ModerationStatus.objects.exists()
+    assert Post.objects.get(
+        id=post.id).moderation_status == Post.WAITING_MODERATION
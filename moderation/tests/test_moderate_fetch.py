@@ -1,11 +1,14 @@
 import pytest
+from threading import Barrier, Lock, Thread
 from time import sleep
+from django.db import connection
 from pytest_django.asserts import assertTemplateUsed
 from django.urls import reverse
 from django.utils import timezone
 from posts.models import Post
-from ..models import ModerationStatus, fetch_post_moderate
+from ..models import ModerationStatus, fetch_post_moderate, approve_post
 from .test_utils import create_moderator_test_user, create_active_test_user, create_test_post
+from users.models import User
 
 
 @pytest.mark.django_db
@@ -125,3 +128,57 @@ def test_fetch_post_banned_until_user_expired(client, valid_user_1, valid_user_2
     sleep(1)
     post_moderating = fetch_post_moderate(user1)
     assert post_moderating == post
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_moderators(valid_user_1, valid_image_file):
+    moderators_count = 4
+    backlog = 12
+    author = create_active_test_user(valid_user_1)
+    posts = [create_test_post(author, valid_image_file).id
+             for _ in range(backlog)]
+    moderators = []
+
+    for i in range(moderators_count):
+        moderators.append(create_moderator_test_user({
+            'username': f'moderator{i}',
+            'email': f'moderator{i}@email.com',
+            'password': 'mvps8xa0'
+        }).id)
+
+    barrier = Barrier(moderators_count)
+    lock = Lock()
+    claimed = []
+    errors = []
+
+    def moderate(moderator_id):
+        try:
+            moderator = User.objects.get(id=moderator_id)
+            barrier.wait()
+
+            while True:
+                post = fetch_post_moderate(moderator)
+
+                if not post:
+                    break
+
+                with lock:
+                    claimed.append(post.id)
+
+                approve_post(moderator, post.identifier)
+        except Exception as err:
+            errors.append(err)
+        finally:
+            connection.close()
+
+    threads = [Thread(target=moderate, args=(_,)) for _ in moderators]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert sorted(claimed) == sorted(posts)
+    assert Post.objects.filter(moderation_status=Post.APPROVED).count() == backlog
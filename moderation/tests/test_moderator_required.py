@@ -13,6 +13,8 @@ from .test_utils import create_active_test_user
     ('moderation:moderate-start', {}),
     ('moderation:moderate-fetch', {}),
     ('moderation:moderate-stop', {}),
+    ('moderation:moderate-batch', {}),
+    ('moderation:moderate-batch-stop', {}),
     ('moderation:moderate-post', {'id': 0}),
     ('moderation:moderate-approve', {'id': 0}),
     ('moderation:moderate-deny', {'id': 0}),
@@ -35,6 +37,8 @@ def test_successful_login_required_request(client, view, valid_user_1):
     ('moderation:moderate-start', {}),
     ('moderation:moderate-fetch', {}),
     ('moderation:moderate-stop', {}),
+    ('moderation:moderate-batch', {}),
+    ('moderation:moderate-batch-stop', {}),
     ('moderation:moderate-post', {'id': 0}),
     ('moderation:moderate-approve', {'id': 0}),
     ('moderation:moderate-deny', {'id': 0}),
@@ -13,6 +13,8 @@ from .test_utils import create_moderator_test_user
     ('moderation:moderate-start', {}, 200, 405, 405, 405, 405),
     ('moderation:moderate-fetch', {}, 200, 405, 405, 405, 405),
     ('moderation:moderate-stop', {}, 200, 405, 405, 405, 405),
+    ('moderation:moderate-batch', {}, 200, 200, 405, 405, 405),
+    ('moderation:moderate-batch-stop', {}, 200, 405, 405, 405, 405),
     ('moderation:moderate-post', {'id': 0}, 404, 405, 405, 405, 405),
     ('moderation:moderate-approve', {'id': 0}, 404, 405, 405, 405, 405),
     ('moderation:moderate-deny', {'id': 0}, 404, 404, 405, 405, 405),
@@ -15,6 +15,9 @@ urlpatterns = [
     path('moderate/', views.ModerateStartView.as_view(), name='moderate-start'),
     path('moderate/fetch/', views.ModerateFetchView.as_view(), name='moderate-fetch'),
     path('moderate/stop/', views.StopModerateView.as_view(), name='moderate-stop'),
+    path('moderate/batch/', views.ModerateBatchView.as_view(), name='moderate-batch'),
+    path('moderate/batch/stop/', views.StopModerateBatchView.as_view(),
+         name='moderate-batch-stop'),
     path('moderate/post/<str:id>/',
          views.ModeratePostView.as_view(), name='moderate-post'),
     path('moderate/post/<str:id>/approve/',
@@ -3,14 +3,15 @@ from django.contrib import messages
 from django.utils.decorators import method_decorator
 from django.urls import reverse, reverse_lazy
 from django.views.generic import (
-    View, TemplateView, RedirectView, ListView, CreateView, UpdateView, DeleteView, DetailView)
+    View, TemplateView, RedirectView, ListView, CreateView, UpdateView, DeleteView, DetailView, FormView)
 from base.views import PrgView
 from posts.models import Post
 from .decorators import moderator_required
-from .forms import DenyPostForm
+from .forms import DenyPostForm, BatchModerateForm
 from .models import (PostDenialReason, ModerationStatus, get_reasons_moderator,
                      get_total_reasons_moderator, get_denial_reason, get_post_moderating,
-                     check_post_moderating, fetch_post_moderate, stop_moderating, approve_post)
+                     check_post_moderating, fetch_post_moderate, stop_moderating, approve_post,
+                     get_posts_moderating_batch, fetch_posts_moderate_batch, stop_moderating_batch)
 
 
 @method_decorator(moderator_required, 'dispatch')
@@ -117,6 +118,9 @@ class ModerateStartView(ModerationView, TemplateView):
         if post:
             return redirect('moderation:moderate-post', id=post.identifier)
 
+        if get_posts_moderating_batch(request.user):
+            return redirect('moderation:moderate-batch')
+
         return super().get(request, *args, **kwargs)
 
 
@@ -202,3 +206,43 @@ class ModerateDenyView(ModerationView, PrgView, CreateView):
         kwargs['user'] = self.request.user
         kwargs['post'] = get_post_moderating(self.request.user)
         return kwargs
+
+
+class ModerateBatchView(ModerationView, PrgView, FormView):
+    form_class = BatchModerateForm
+    template_name = 'moderation/moderate_batch.html'
+    http_method_names = ['get', 'post']
+    success_url = reverse_lazy('moderation:moderate-batch')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['title'] = 'Moderate'
+        return context
+
+    def get(self, request, *args, **kwargs):
+        self.posts = fetch_posts_moderate_batch(request.user)
+        return super().get(request, *args, **kwargs)
+
+    def post(self, request, *args, **kwargs):
+        self.posts = get_posts_moderating_batch(request.user)
+        return super().post(request, *args, **kwargs)
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        kwargs['posts'] = self.posts
+        return kwargs
+
+    def form_valid(self, form):
+        total = form.save()
+        messages.success(self.request, f'{total} post(s) moderated.')
+        return super().form_valid(form)
+
+
+class StopModerateBatchView(ModerationView, RedirectView):
+    pattern_name = 'moderation:moderate-start'
+    http_method_names = ['get']
+
+    def get(self, request, *args, **kwargs):
+        stop_moderating_batch(request.user)
+        return super().get(request, *args, **kwargs)
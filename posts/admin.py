@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Post, PostTag
+from .models import Post, PostTag, add_post_tags
 
 
 class PostTagAdmin(admin.TabularInline):
@@ -10,7 +10,7 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ['author__username', 'moderation_status']
     fieldsets = (
         (None, {'fields': ('author', 'meme_file', 'approved_at',
-                           'moderation_status', 'meme_text', 'meme_labelled')}),
+                           'moderation_status', 'meme_text', 'meme_labelled', 'meme_processed')}),
     )
 
     inlines = (PostTagAdmin,)
@@ -29,5 +29,26 @@ class PostAdmin(admin.ModelAdmin):
 
         return queryset, use_distinct
 
+    def save_formset(self, request, form, formset, change):
+        if formset.model != PostTag:
+            return super().save_formset(request, form, formset, change)
+
+        tags = formset.save(commit=False)
+
+        if not tags and not formset.deleted_objects:
+            return
+
+        for tag in formset.deleted_objects + [_ for _ in tags if _.pk]:
+            tag.defer_post_labels = True
+
+        for tag in formset.deleted_objects:
+            tag.delete()
+
+        for tag in tags:
+            if tag.pk:
+                tag.save()
+
+        add_post_tags(form.instance, [_.description for _ in tags if not _.pk])
+
 
 admin.site.register(Post, PostAdmin)
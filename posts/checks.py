@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+from users.checks import is_local_cache
+
+
+@register(Tags.caches)
+def check_feed_cache(app_configs, **kwargs):
+    if settings.DEBUG or settings.TEST_MODE:
+        return []
+
+    # feed versions bumped by Celery or other workers never reach a cache kept in the process memory
+    if settings.FEED_CACHE_TIMEOUT and is_local_cache():
+        return [Warning('The feed pages are cached in a cache not shared by the processes.',
+                        hint='Set CACHE_URL to a shared backend, like Redis or Memcached.', id='posts.W001')]
+
+    return []
@@ -0,0 +1,103 @@
+from time import time_ns
+from itsdangerous.exc import BadSignature
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+FEED_VERSION_KEY = 'feed:version:{}'
+FEED_PAGE_KEY = 'feed:page:{}:{}:{}:{}'
+FEED_HITS_KEY = 'feed:hits'
+FEED_MISSES_KEY = 'feed:misses'
+
+
+def _get_scope(author_id=None):
+    return f'author:{author_id}' if author_id else 'home'
+
+
+def _get_version(scope):
+    key = FEED_VERSION_KEY.format(scope)
+    version = cache.get(key)
+
+    if version is None:
+        cache.add(key, time_ns(), None)
+        version = cache.get(key)
+
+    return version
+
+
+def _bump_version(scope):
+    key = FEED_VERSION_KEY.format(scope)
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time_ns(), None)
+
+
+def _increase_counter(key):
+    cache.add(key, 0, None)
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def _get_page_key_value(func, value):
+    from .models import get_approved_posts_cursor, load_feed_cursor
+
+    if func is not get_approved_posts_cursor:
+        return int(value)
+
+    if not value:
+        return ''
+
+    approved_at, id_ = load_feed_cursor(value)
+    return f'{approved_at.isoformat()}:{id_}'
+
+
+def get_cached_feed(func, value, search_filter, author=None, **kwargs):
+    if search_filter:
+        return func(value, search_filter, author, **kwargs)
+
+    try:
+        # equivalent requests share a key and invalid ones never reach the cache
+        key_value = _get_page_key_value(func, value)
+    except (BadSignature, TypeError, ValueError):
+        return func(value, search_filter, author, **kwargs)
+
+    scope = _get_scope(author.id if author else None)
+    key = FEED_PAGE_KEY.format(
+        scope, _get_version(scope), func.__name__, key_value)
+    data = cache.get(key)
+
+    if data is not None:
+        _increase_counter(FEED_HITS_KEY)
+        return data
+
+    _increase_counter(FEED_MISSES_KEY)
+    data = func(value, search_filter, author, **kwargs)
+    cache.set(key, data, settings.FEED_CACHE_TIMEOUT)
+    return data
+
+
+def _bump_feed_versions(author_id):
+    _bump_version(_get_scope())
+    _bump_version(_get_scope(author_id))
+
+
+def invalidate_feed(author_id):
+    _bump_feed_versions(author_id)
+    # a concurrent request may cache the old rows again until the transaction commits
+    transaction.on_commit(lambda: _bump_feed_versions(author_id))
+
+
+def get_feed_cache_stats():
+    return {
+        'hits': cache.get(FEED_HITS_KEY, 0),
+        'misses': cache.get(FEED_MISSES_KEY, 0)
+    }
+
+
+def reset_feed_cache_stats():
+    cache.delete_many([FEED_HITS_KEY, FEED_MISSES_KEY])
@@ -2,7 +2,7 @@ from django import forms
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from base.utils import resized_img
+from base.utils import resized_img, validate_img_pixels
 from .models import Post
 
 
@@ -28,6 +28,8 @@ class CreatePostForm(forms.ModelForm):
                 raise ValidationError(
                     f'Files does not have an approved format : {formats}')
 
+            validate_img_pixels(meme_file)
+
         return meme_file
 
     def clean(self):
@@ -48,7 +50,10 @@ class CreatePostForm(forms.ModelForm):
     def save(self, commit=True):
         meme_file = self.cleaned_data.get('meme_file')
 
-        if meme_file:
+        if settings.ASYNC_POST_INGESTION:
+            # the file is resized later by the process_post task
+            self.instance.meme_processed = False
+        elif meme_file:
             resized_img(meme_file, self.instance.meme_file.file,
                         settings.MEME_SIZE)
 
@@ -0,0 +1,36 @@
+from celery.utils.log import get_task_logger
+from google.cloud import vision
+from .post_labeller import get_tags_from_annotation
+from .post_text_extractor import get_text_from_annotation
+from .utils import get_client, get_image_from_post
+
+logger = get_task_logger(__name__)
+
+FEATURES = [
+    vision.Feature(type_=vision.Feature.Type.WEB_DETECTION),
+    vision.Feature(type_=vision.Feature.Type.TEXT_DETECTION)
+]
+
+
+def annotate_posts(posts):
+    posts_images = [(post, get_image_from_post(post)) for post in posts]
+    posts_images = [_ for _ in posts_images if _[1]]
+
+    if not posts_images:
+        return {}
+
+    requests = [vision.AnnotateImageRequest(image=image, features=FEATURES)
+                for _, image in posts_images]
+    response = get_client().batch_annotate_images(requests=requests)
+    annotations = {}
+
+    for (post, _), result in zip(posts_images, response.responses):
+        if result.error.message:
+            logger.info(
+                f'Post with id {post.id} not annotated: {result.error.message}')
+            continue
+
+        annotations[post.id] = (get_tags_from_annotation(result.web_detection),
+                                get_text_from_annotation(result.full_text_annotation))
+
+    return annotations
@@ -0,0 +1,37 @@
+from time import sleep
+from google.cloud import vision
+
+
+class FakeImageAnnotatorClient:
+    def __init__(self, labels=None, text=None, latency=0):
+        self.labels = labels or []
+        self.text = text
+        self.latency = latency
+        self.calls = 0
+
+    def _call(self):
+        self.calls += 1
+
+        if self.latency:
+            sleep(self.latency)
+
+    def _web_detection(self):
+        return vision.WebDetection(best_guess_labels=[
+            vision.WebDetection.WebLabel(label=_) for _ in self.labels])
+
+    def _full_text_annotation(self):
+        return vision.TextAnnotation(text=self.text or '')
+
+    def web_detection(self, image):
+        self._call()
+        return vision.AnnotateImageResponse(web_detection=self._web_detection())
+
+    def text_detection(self, image):
+        self._call()
+        return vision.AnnotateImageResponse(full_text_annotation=self._full_text_annotation())
+
+    def batch_annotate_images(self, requests):
+        self._call()
+        return vision.BatchAnnotateImagesResponse(responses=[vision.AnnotateImageResponse(
+            web_detection=self._web_detection(), full_text_annotation=self._full_text_annotation())
+            for _ in requests])
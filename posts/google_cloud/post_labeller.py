@@ -11,10 +11,12 @@ def _annotate(post):
     return response.web_detection
 
 
-def get_post_tags(post):
-    result = _annotate(post)
-
+def get_tags_from_annotation(result):
     if result and result.best_guess_labels:
         return [_.label for _ in result.best_guess_labels if _.label]
 
     return None
+
+
+def get_post_tags(post):
+    return get_tags_from_annotation(_annotate(post))
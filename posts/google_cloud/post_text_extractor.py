@@ -11,10 +11,12 @@ def _annotate(post):
     return response.full_text_annotation
 
 
-def get_post_text(post):
-    result = _annotate(post)
-
+def get_text_from_annotation(result):
     if result and result.text:
         return result.text.replace('\n', ' ')
 
     return None
+
+
+def get_post_text(post):
+    return get_text_from_annotation(_annotate(post))
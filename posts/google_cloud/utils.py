@@ -1,13 +1,27 @@
-import io
 from django.core.files.storage import default_storage
 from google.cloud import vision
 
+_client = None
 
-def get_client_image_from_post(post):
+
+def get_client():
+    global _client
+
+    if _client is None:
+        _client = vision.ImageAnnotatorClient()
+
+    return _client
+
+
+def set_client(client):
+    global _client
+    _client = client
+
+
+def get_image_from_post(post):
     if not default_storage.exists(post.meme_file.name):
-        return None, None
+        return None
 
-    client = vision.ImageAnnotatorClient()
     path = post.meme_file.url
 
     if path.startswith('http') or path.startswith('gs:'):
@@ -15,9 +29,18 @@ def get_client_image_from_post(post):
         image.source.image_uri = path
 
     else:
-        with io.open(post.meme_file.path, 'rb') as img:
+        with default_storage.open(post.meme_file.name, 'rb') as img:
             content = img.read()
 
         image = vision.Image(content=content)
 
-    return client, image
+    return image
+
+
+def get_client_image_from_post(post):
+    image = get_image_from_post(post)
+
+    if not image:
+        return None, None
+
+    return get_client(), image
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from posts.feed_cache import get_feed_cache_stats, reset_feed_cache_stats
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true',
+                            help='Reset the counters after printing them')
+
+    def handle(self, *args, **options):
+        stats = get_feed_cache_stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total if total else 0
+        print(f'Feed cache hits: {stats["hits"]}. Misses: {stats["misses"]}. Hit ratio: {ratio:.2%}')
+
+        if options['reset']:
+            reset_feed_cache_stats()
+            print('Feed cache counters reset...')
@@ -0,0 +1,21 @@
+# Generated by Django 3.1.6 on 2026-10-18 14:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0002_auto_20210521_1728'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['moderation_status', '-approved_at', '-id'], name='post_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', 'moderation_status', '-approved_at', '-id'], name='post_author_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 3.1.6 on 2026-10-18 14:31
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def populate_search_vector(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    User = apps.get_model('users', 'User')
+    username = Subquery(User.objects.filter(
+        id=OuterRef('author_id')).values('username')[:1])
+    Post.objects.update(search_vector=SearchVector('meme_labels', weight='A') +
+                        SearchVector('meme_text', weight='B') + SearchVector(username, weight='C'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_post_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='post_search_vector_idx'),
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.1.6 on 2026-10-18 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_post_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(moderation_status='W'), fields=['created_at'], name='post_waiting_moderation_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.1.6 on 2026-10-18 14:56
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_post_waiting_moderation_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='meme_renditions',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.PositiveSmallIntegerField(), blank=True, default=list, size=None),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.6 on 2026-10-18 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_meme_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='meme_processed',
+            field=models.BooleanField(default=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.1.6 on 2026-10-18 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_post_meme_processed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='meme_label_attempted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='meme_label_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -1,28 +1,43 @@
 import os
 import secrets
-from django.db import models
+from itsdangerous.exc import BadSignature
+from django.db import models, transaction, IntegrityError
+from django.db.models import ExpressionWrapper, F, Func, Q, Prefetch, Value
 from django.db.models.signals import post_save, pre_save, post_delete
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, SearchVectorField
 from django.conf import settings
 from django.core.paginator import Paginator
 from django.core.files.storage import default_storage
 from django.http import Http404
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from base.renditions import delete_renditions, get_srcset
+from base.url_serializer import url_serializer
 from users.models import validate_user
-from .tasks import get_post_labels
+from .feed_cache import invalidate_feed
+from .tasks import create_post_renditions, process_post
 
 UserModel = get_user_model()
+SORT_RELEVANCE = 'relevance'
 
 
 def _meme_path(instance, filename):
     ext = os.path.splitext(filename)[1]
     user_folder = instance.get_user_folder()
+
+    if not instance.meme_processed:
+        return f'{Post.STAGING_FOLDER}/{user_folder}/{instance.identifier}{ext}'
+
     return f'{user_folder}/{instance.identifier}{ext}'
 
 
 class Post(models.Model):
     MEMES_FOLDER = 'posts'
+    STAGING_FOLDER = 'staging'
     WAITING_MODERATION = 'W'
     MODERATING = 'M'
     APPROVED = 'A'
@@ -33,6 +48,10 @@ class Post(models.Model):
         (APPROVED, 'Approved'),
         (DENIED, 'Denied')
     ]
+    TRACKED_FIELDS = ('meme_file', 'moderation_status',
+                      'meme_text', 'meme_labels')
+    IDENTIFIER_BYTES = 8
+    IDENTIFIER_ATTEMPTS = 5
 
     created_at = models.DateTimeField(auto_now_add=True)
     author = models.ForeignKey(
@@ -45,7 +64,56 @@ class Post(models.Model):
     meme_labels = models.TextField(blank=True, null=True)
     meme_text = models.TextField(blank=True, null=True)
     meme_labelled = models.BooleanField(default=False)
+    meme_label_attempts = models.PositiveSmallIntegerField(default=0)
+    meme_label_attempted_at = models.DateTimeField(blank=True, null=True)
+    meme_processed = models.BooleanField(default=True)
     meme_search = models.TextField(blank=True, null=True)
+    search_vector = SearchVectorField(blank=True, null=True)
+    meme_renditions = ArrayField(
+        models.PositiveSmallIntegerField(), default=list, blank=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='post_search_vector_idx'),
+            models.Index(fields=['moderation_status', '-approved_at', '-id'],
+                         name='post_feed_idx'),
+            models.Index(fields=['author', 'moderation_status', '-approved_at', '-id'],
+                         name='post_author_feed_idx'),
+            models.Index(fields=['created_at'], name='post_waiting_moderation_idx',
+                         condition=Q(moderation_status='W')),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+
+        if all(field in field_names for field in Post.TRACKED_FIELDS):
+            instance._saved_state = instance._get_state()
+
+        return instance
+
+    def _get_state(self):
+        state = {field: getattr(self, field) for field in Post.TRACKED_FIELDS}
+        state['meme_file'] = self.meme_file.name
+        return state
+
+    def get_saved_state(self):
+        if not hasattr(self, '_saved_state'):
+            self._saved_state = None
+
+            if self.id:
+                self._saved_state = Post.objects.filter(
+                    id=self.id).values(*Post.TRACKED_FIELDS).first()
+
+        return self._saved_state
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using, fields)
+
+        if fields is None:
+            self._saved_state = self._get_state()
+        elif hasattr(self, '_saved_state'):
+            del self._saved_state
 
     @property
     def tags_sorted(self):
@@ -58,30 +126,35 @@ class Post(models.Model):
         return f'{Post.MEMES_FOLDER}/{self.author.username}'
 
     def _get_identifier(self):
-        user_folder = self.get_user_folder()
-
-        if not user_folder:
+        if not self.get_user_folder():
             return None
 
-        while True:
-            filename = secrets.token_hex(4)
+        return secrets.token_hex(Post.IDENTIFIER_BYTES)
 
-            if not default_storage.exists(user_folder):
-                break
+    def _set_new_identifier(self):
+        # the file path depends on the identifier, so it is checked before the file is stored
+        for _ in range(Post.IDENTIFIER_ATTEMPTS):
+            identifier = self._get_identifier()
 
-            for file in default_storage.listdir(user_folder)[1]:
-                if os.path.splitext(file)[0] == filename:
-                    break
-            else:
-                break
+            if not Post.objects.filter(identifier=identifier).exists():
+                self.identifier = identifier
+                return
 
-        return filename
+        raise IntegrityError('Unique post identifier not found.')
 
     def save(self, *args, **kwargs):
         if not self.identifier:
-            self.identifier = self._get_identifier()
+            self._set_new_identifier()
 
         super().save(*args, **kwargs)
+        state = self._get_state()
+        update_fields = kwargs.get('update_fields')
+
+        if update_fields is not None and getattr(self, '_saved_state', None):
+            state = {field: state[field] if field in update_fields else value
+                     for field, value in self._saved_state.items()}
+
+        self._saved_state = state
 
     def __str__(self):
         status = self.moderation_status
@@ -99,15 +172,37 @@ class PostTag(models.Model):
     post = models.ForeignKey(
         Post, on_delete=models.CASCADE, related_name='tags')
 
+    # set when the caller recomputes the post labels itself, see update_post_labels
+    defer_post_labels = False
+
     class Meta:
         unique_together = ('post', 'description')
 
 
+def add_post_tags(post, descriptions):
+    PostTag.objects.bulk_create([PostTag(post=post, description=_) for _ in set(descriptions)],
+                                ignore_conflicts=True)
+    update_post_labels(post)
+
+
+def update_post_labels(post):
+    post.meme_labels = ' '.join(
+        post.tags.order_by('description').values_list('description', flat=True))
+    post.save()
+    invalidate_feed(post.author_id)
+
+
 def delete_meme_file(post):
-    if default_storage.exists(post.meme_file.name):
-        default_storage.delete(post.meme_file.name)
+    _delete_meme_file_name(post.meme_file.name, post.meme_renditions)
+
+
+def _delete_meme_file_name(name, renditions=None):
+    if default_storage.exists(name):
+        default_storage.delete(name)
 
-    folder = os.path.dirname(post.meme_file.name)
+    delete_renditions(name, renditions)
+
+    folder = os.path.dirname(name)
 
     if default_storage.exists(folder):
         folders, files = default_storage.listdir(folder)
@@ -116,68 +211,165 @@ def delete_meme_file(post):
             default_storage.delete(folder)
 
 
-def get_approved_posts(page, search_filter, author=None):
-    response = {}
-    response['posts'] = []
-    response['has_next'] = False
+def get_post_search_vector(post):
+    def vector(text, weight):
+        return SearchVector(Value(text, output_field=models.TextField()), weight=weight)
 
+    return vector(post.meme_labels, 'A') + vector(post.meme_text, 'B') + vector(post.author.username, 'C')
+
+
+def _get_approved_posts_queryset(search_filter, author=None, sort=None):
     if author:
         posts = author.posts.filter(moderation_status=Post.APPROVED)
     else:
         posts = Post.objects.filter(moderation_status=Post.APPROVED)
 
+    tags = Prefetch('tags', queryset=PostTag.objects.order_by('description'))
+    posts = posts.select_related('author').prefetch_related(tags)
+
     if search_filter:
-        posts &= Post.objects.filter(meme_search__search=search_filter)
+        query = SearchQuery(search_filter)
+        posts = posts.filter(search_vector=query)
 
-    posts = posts.order_by('-approved_at')
-    p = Paginator(posts, settings.POSTS_PER_PAGE)
-    page = int(page)
+        if sort == SORT_RELEVANCE:
+            posts = posts.annotate(rank=SearchRank(F('search_vector'), query))
+            return posts.order_by('-rank', '-approved_at', '-id')
 
-    if page not in p.page_range:
-        return response
+    return posts.order_by('-approved_at', '-id')
 
-    response['has_next'] = p.page(page).has_next()
-    page_posts = p.page(page).object_list
+
+def _get_approved_posts_data(page_posts):
+    posts_data = []
 
     for post in page_posts:
         post_data = {}
         post_data['profile_pic_url'] = post.author.profile_pic.url
+        post_data['profile_pic_srcset'] = get_srcset(
+            post.author.profile_pic.name, post.author.profile_pic_renditions)
         post_data['author'] = post.author.username
         post_data['meme_url'] = post.meme_file.url
+        post_data['meme_srcset'] = get_srcset(
+            post.meme_file.name, post.meme_renditions)
         post_data['post_link'] = reverse(
             'posts:post-view', kwargs={'id': post.identifier})
         post_data['author_link'] = reverse(
             'posts:author-posts', kwargs={'username': post.author.username})
-        post_data['tags'] = [
-            _.description for _ in post.tags.order_by('description')]
-        response['posts'].append(post_data)
+        post_data['tags'] = [_.description for _ in post.tags.all()]
+        posts_data.append(post_data)
+
+    return posts_data
+
+
+def get_approved_posts(page, search_filter, author=None, sort=None):
+    response = {}
+    response['posts'] = []
+    response['has_next'] = False
+    posts = _get_approved_posts_queryset(search_filter, author, sort)
+    p = Paginator(posts, settings.POSTS_PER_PAGE)
+    page = int(page)
+
+    if page not in p.page_range:
+        return response
 
+    response['has_next'] = p.page(page).has_next()
+    page_posts = p.page(page).object_list
+    response['posts'] = _get_approved_posts_data(page_posts)
     return response
 
 
+def get_feed_cursor(post):
+    return url_serializer.dumps([post.approved_at.isoformat(), post.id], salt='feed-cursor')
+
+
+def load_feed_cursor(cursor):
+    approved_at, id_ = url_serializer.loads(cursor, salt='feed-cursor')
+    approved_at = parse_datetime(approved_at)
+
+    if not approved_at:
+        raise ValueError('Invalid cursor.')
+
+    return approved_at, int(id_)
+
+
+def filter_feed_cursor(posts, approved_at, id_):
+    # the redundant bound lets the feed indexes start the scan at the cursor instead of filtering the OR
+    return posts.filter(Q(approved_at__lt=approved_at) | Q(approved_at=approved_at, id__lt=id_),
+                        approved_at__lte=approved_at)
+
+
+def get_approved_posts_cursor(cursor, search_filter, author=None):
+    response = {}
+    response['posts'] = []
+    response['next_cursor'] = None
+    # posts without approval date cannot be turned into a cursor
+    posts = _get_approved_posts_queryset(
+        search_filter, author).filter(approved_at__isnull=False)
+
+    if cursor:
+        try:
+            approved_at, id_ = load_feed_cursor(cursor)
+        except (BadSignature, TypeError, ValueError):
+            return response
+
+        posts = filter_feed_cursor(posts, approved_at, id_)
+
+    page_posts = list(posts[:settings.POSTS_PER_PAGE + 1])
+
+    if len(page_posts) > settings.POSTS_PER_PAGE:
+        page_posts = page_posts[:settings.POSTS_PER_PAGE]
+        response['next_cursor'] = get_feed_cursor(page_posts[-1])
+
+    response['posts'] = _get_approved_posts_data(page_posts)
+    return response
+
+
+def _format_date(field, offset):
+    # shifted and formatted by the database, so the page rows need no per date work in python
+    date = ExpressionWrapper(F(field) - Value(offset), output_field=models.DateTimeField())
+    return Func(date, Value(settings.DATE_TIME_DISPLAY_SQL_FORMAT), function='to_char',
+                output_field=models.CharField())
+
+
+def _get_user_posts_queryset(user, offset):
+    from moderation.models import ModerationStatus
+
+    statuses = ModerationStatus.objects.filter(
+        result__in=(ModerationStatus.MODERATING, ModerationStatus.DENIED)).select_related(
+        'denial_reason').annotate(created_at_display=_format_date('created_at', offset)).order_by('id')
+    return user.posts.prefetch_related(
+        Prefetch('status', queryset=statuses, to_attr='pending_statuses')).order_by('-created_at')
+
+
 def get_user_posts(user, page, client_timezone=0):
     from moderation.models import ModerationStatus
 
     response = {}
     response['posts'] = []
     response['has_next'] = False
-    posts = user.posts.order_by('-created_at')
+    offset = timezone.timedelta(minutes=int(client_timezone))
+    posts = _get_user_posts_queryset(user, offset)
     p = Paginator(posts, settings.POSTS_PER_PAGE)
     page = int(page)
-    client_timezone = int(client_timezone)
 
     if page not in p.page_range:
         return response
 
-    response['has_next'] = p.page(page).has_next()
-    page_posts = p.page(page).object_list
+    status_results = {
+        Post.MODERATING: ModerationStatus.MODERATING,
+        Post.DENIED: ModerationStatus.DENIED
+    }
+
+    page = p.page(page)
+    response['has_next'] = page.has_next()
+    # annotated after counting, the count query would format the dates of every post otherwise
+    page_posts = posts.annotate(created_at_display=_format_date('created_at', offset),
+                                approved_at_display=_format_date('approved_at', offset))[
+        page.start_index() - 1:page.end_index()]
 
     for post in page_posts:
         post_data = {}
         post_data['meme_url'] = post.meme_file.url
-        date = post.created_at - timezone.timedelta(minutes=client_timezone)
-        date = date.strftime(settings.DATE_TIME_DISPLAY_FORMAT)
-        post_data['post_created_at'] = date
+        post_data['post_created_at'] = post.created_at_display
         post_data['is_waiting_moderation'] = post.moderation_status == Post.WAITING_MODERATION
         post_data['is_moderating'] = post.moderation_status == Post.MODERATING
         post_data['is_denied'] = post.moderation_status == Post.DENIED
@@ -185,24 +377,15 @@ def get_user_posts(user, page, client_timezone=0):
         post_data['status_created_at'] = ''
         post_data['denial_reason'] = ''
         post_data['denial_details'] = ''
-        status = None
-
-        if post.moderation_status == Post.MODERATING:
-            status = post.status.filter(
-                result=ModerationStatus.MODERATING).first()
-        elif post.moderation_status == Post.DENIED:
-            status = post.status.filter(result=ModerationStatus.DENIED).first()
-        elif post.moderation_status == Post.APPROVED:
-            date = post.approved_at - \
-                timezone.timedelta(minutes=client_timezone)
-            post_data['status_created_at'] = date.strftime(
-                settings.DATE_TIME_DISPLAY_FORMAT)
+        result = status_results.get(post.moderation_status)
+        status = next(
+            (_ for _ in post.pending_statuses if _.result == result), None)
+
+        if post.moderation_status == Post.APPROVED:
+            post_data['status_created_at'] = post.approved_at_display or ''
 
         if status:
-            date = status.created_at - \
-                timezone.timedelta(minutes=client_timezone)
-            post_data['status_created_at'] = date.strftime(
-                settings.DATE_TIME_DISPLAY_FORMAT)
+            post_data['status_created_at'] = status.created_at_display
 
             if post.moderation_status == Post.DENIED:
                 post_data['denial_reason'] = status.denial_reason.description if status.denial_reason else 'Reason deleted'
@@ -230,38 +413,60 @@ def get_author(username):
 
 
 def __delete_old_meme_file_pre_save(sender, instance, **kwargs):
-    current_post = Post.objects.filter(id=instance.id).first()
+    saved_state = instance.get_saved_state()
 
-    if not current_post or instance.meme_file == current_post.meme_file:
+    if not saved_state or instance.meme_file == saved_state['meme_file']:
         return
 
-    delete_meme_file(current_post)
+    _delete_meme_file_name(saved_state['meme_file'], instance.meme_renditions)
+    instance.meme_renditions = []
 
 
 def __delete_old_meme_file(sender, instance, **kwargs):
     delete_meme_file(instance)
 
 
-def __increase_author_post_count(sender, instance, created, **kwargs):
-    if not created:
+def __process_post(sender, instance, created, **kwargs):
+    if settings.TEST_MODE or not created or instance.meme_processed:
         return
 
-    instance.author.increase_post_count()
-    instance.author.save()
+    transaction.on_commit(lambda: process_post.delay(instance.id))
 
 
-def __get_post_labels(sender, instance, created, **kwargs):
-    if settings.TEST_MODE:
+def __create_post_renditions(sender, instance, created, **kwargs):
+    if settings.TEST_MODE or not instance.meme_processed:
         return
 
-    if instance.moderation_status != Post.APPROVED:
+    saved_state = instance.get_saved_state()
+
+    if saved_state and saved_state['meme_file'] == instance.meme_file.name:
         return
 
-    if not instance.meme_labelled:
-        get_post_labels.delay(instance.id)
+    transaction.on_commit(lambda: create_post_renditions.delay(instance.id))
+
+
+def __invalidate_post_feed(sender, instance, **kwargs):
+    invalidate_feed(instance.author_id)
+
+
+def __invalidate_post_tag_feed(sender, instance, **kwargs):
+    if instance.defer_post_labels:
+        return
+
+    invalidate_feed(instance.post.author_id)
+
+
+def __increase_author_post_count(sender, instance, created, **kwargs):
+    if not created:
+        return
+
+    instance.author.increase_post_count()
 
 
 def __label_post(sender, instance, **kwargs):
+    if instance.defer_post_labels:
+        return
+
     labels = [
         _.description for _ in instance.post.tags.order_by('description')]
     instance.post.meme_labels = ' '.join(labels)
@@ -269,33 +474,38 @@ def __label_post(sender, instance, **kwargs):
 
 
 def __user_max_posts_interval(sender, instance, **kwargs):
-    current_post = Post.objects.filter(id=instance.id).first()
+    saved_state = instance.get_saved_state()
 
     if instance.moderation_status == Post.APPROVED:
-        if not current_post or current_post.moderation_status != Post.APPROVED:
+        if not saved_state or saved_state['moderation_status'] != Post.APPROVED:
             instance.author.max_posts_interval = min(
                 settings.MAX_MAX_CONSECUTIVE_POSTS, instance.author.max_posts_interval + 1)
-            instance.author.save()
+            instance.author.save(update_fields=['max_posts_interval'])
     elif instance.moderation_status == Post.DENIED:
-        if not current_post or current_post.moderation_status != Post.DENIED:
+        if not saved_state or saved_state['moderation_status'] != Post.DENIED:
             instance.author.max_posts_interval = max(
                 settings.MIN_MAX_CONSECUTIVE_POSTS, instance.author.max_posts_interval - 1)
-            instance.author.save()
+            instance.author.save(update_fields=['max_posts_interval'])
 
 
 def __feed_post_search(sender, instance, **kwargs):
-    current_post = Post.objects.filter(id=instance.id).first()
+    saved_state = instance.get_saved_state()
 
-    if (not current_post or current_post.meme_text != instance.meme_text or
-            current_post.meme_labels != instance.meme_labels or instance.author.username not in instance.meme_search):
+    if (not saved_state or saved_state['meme_text'] != instance.meme_text or
+            saved_state['meme_labels'] != instance.meme_labels or instance.author.username not in instance.meme_search):
         instance.meme_search = f'{instance.meme_text} {instance.meme_labels} {instance.author.username}'
+        instance.search_vector = get_post_search_vector(instance)
 
 
 pre_save.connect(__delete_old_meme_file_pre_save, sender=Post)
 post_delete.connect(__delete_old_meme_file, sender=Post)
 post_save.connect(__increase_author_post_count, sender=Post)
-post_save.connect(__get_post_labels, sender=Post)
+post_save.connect(__create_post_renditions, sender=Post)
+post_save.connect(__process_post, sender=Post)
 pre_save.connect(__user_max_posts_interval, sender=Post)
 pre_save.connect(__feed_post_search, sender=Post)
 post_save.connect(__label_post, sender=PostTag)
 post_delete.connect(__label_post, sender=PostTag)
+post_delete.connect(__invalidate_post_feed, sender=Post)
+post_save.connect(__invalidate_post_tag_feed, sender=PostTag)
+post_delete.connect(__invalidate_post_tag_feed, sender=PostTag)
@@ -6,16 +6,16 @@ const postTemplate = document.querySelector('#post-template');
 const noPostTemplate = document.querySelector('#no-post-template');
 const tagTemplate = document.querySelector('#tag-template');
 var sentinel = document.querySelector('#sentinel');
-var page = 1;
+var cursor = '';
 var fetching = false;
 var filter = '';
 
 function loadPosts() {
-    fetch(`${window.location.pathname}?page=${page}&search=${filter}`).then((response) => {
+    fetch(`${window.location.pathname}?cursor=${cursor}&search=${filter}`).then((response) => {
         response.json().then((data) => {
             fetching = false;
 
-            if (page === 1 && !data.posts.length) {
+            if (cursor === '' && !data.posts.length) {
                 const template = noPostTemplate.content.cloneNode(true);
                 postsContainer.appendChild(template);
                 intersectionObserver.disconnect();
@@ -26,8 +26,10 @@ function loadPosts() {
             for (var i = 0; i < data.posts.length; i++) {
                 const templatePost = postTemplate.content.cloneNode(true);
                 templatePost.querySelector('.author-img').src = data.posts[i].profile_pic_url;
+                templatePost.querySelector('.author-img').srcset = data.posts[i].profile_pic_srcset.join(', ');
                 templatePost.querySelector('.author-username').innerText = data.posts[i].author;
                 templatePost.querySelector('.meme-preview').src = data.posts[i].meme_url;
+                templatePost.querySelector('.meme-preview').srcset = data.posts[i].meme_srcset.join(', ');
                 templatePost.querySelector('.post-link').href = data.posts[i].post_link;
                 const tagsContainer = templatePost.querySelector('.tags-container');
 
@@ -46,11 +48,13 @@ function loadPosts() {
                 }
             }
 
-            page += 1;
-
-            if (!data.has_next) {
+            if (!data.next_cursor) {
+                intersectionObserver.disconnect();
                 sentinel.innerHTML = 'No more memes';
+                return;
             }
+
+            cursor = data.next_cursor;
         });
     });
 }
@@ -90,7 +94,7 @@ $('.search-form').on('submit', function(event) {
     sentinelTemplate = document.querySelector('#sentinel-template').content.cloneNode(true);
     document.body.appendChild(sentinelTemplate);
     sentinel = document.querySelector('#sentinel');
-    page = 1;
+    cursor = '';
     fetching = false;
     filter = document.querySelector('#search-input').value;
     intersectionObserver.observe(sentinel);
@@ -1,13 +1,36 @@
+import os
 from enum import Enum
 from celery import shared_task
 from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.core.files import File
 from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from base.renditions import create_renditions
+from base.utils import resized_img
+from .feed_cache import invalidate_feed
+from .google_cloud.batch_annotator import annotate_posts
 from .google_cloud.post_labeller import get_post_tags
 from .google_cloud.post_text_extractor import get_post_text
 
 logger = get_task_logger(__name__)
 
 
+class ProcessPostResponses(Enum):
+    SUCCESS = 0
+    POST_NOT_FOUND = 1
+    POST_FILE_NOT_FOUND = 2
+    POST_ALREADY_PROCESSED = 3
+
+
+class RenditionsPostResponses(Enum):
+    SUCCESS = 0
+    POST_NOT_FOUND = 1
+    POST_FILE_NOT_FOUND = 2
+
+
 class LabelPostResponses(Enum):
     SUCCESS = 0
     POST_NOT_FOUND = 1
@@ -18,7 +41,7 @@ class LabelPostResponses(Enum):
 
 @shared_task(autoretry_for=(Exception,), retry_kwargs={'max_retries': 2}, default_retry_delay=5 * 60)
 def get_post_labels(id):
-    from .models import Post, PostTag
+    from .models import Post
     post = Post.objects.filter(id=id).first()
 
     if not post:
@@ -37,13 +60,106 @@ def get_post_labels(id):
         logger.info(f'Post with id {id} already labelled...')
         return LabelPostResponses.POST_ALREADY_LABELLED.name
 
-    tags = set(get_post_tags(post))
-    post.meme_text = get_post_text(post)
+    _save_post_labels(post, get_post_tags(post), get_post_text(post))
+    return LabelPostResponses.SUCCESS.name
+
+
+def _save_post_labels(post, tags, text):
+    from .models import add_post_tags
+    post.meme_text = text
     post.meme_labelled = True
-    post.save()
+    add_post_tags(post, tags or [])
 
-    for tag in tags:
-        post_tag = PostTag(post=post, description=tag)
-        post_tag.save()
 
-    return LabelPostResponses.SUCCESS.name
+def _claim_pending_posts(total):
+    from .models import Post
+    retry_at = timezone.now() - timezone.timedelta(seconds=settings.LABEL_POST_RETRY_INTERVAL)
+
+    with transaction.atomic():
+        posts = list(Post.objects.select_for_update(skip_locked=True, of=('self',)).filter(
+            Q(meme_label_attempted_at__isnull=True) | Q(meme_label_attempted_at__lte=retry_at),
+            moderation_status=Post.APPROVED, meme_labelled=False,
+            meme_label_attempts__lt=settings.LABEL_POST_ATTEMPTS).select_related('author').order_by(
+            'approved_at')[:total])
+        # claimed posts are skipped by other workers until the retry interval is over
+        Post.objects.filter(id__in=[_.id for _ in posts]).update(
+            meme_label_attempts=F('meme_label_attempts') + 1, meme_label_attempted_at=timezone.now())
+
+    return posts
+
+
+@shared_task(autoretry_for=(Exception,), retry_kwargs={'max_retries': 2}, default_retry_delay=5 * 60)
+def label_pending_posts(max_posts=None):
+    from .models import Post
+    max_posts = max_posts or settings.LABEL_PENDING_POSTS_MAX
+    total = 0
+
+    while total < max_posts:
+        posts = _claim_pending_posts(
+            min(settings.VISION_BATCH_SIZE, max_posts - total))
+
+        if not posts:
+            break
+
+        annotations = annotate_posts(posts)
+
+        with transaction.atomic():
+            # the locks were released during the request, posts denied meanwhile are not labelled
+            for post in Post.objects.select_for_update(of=('self',)).filter(
+                    id__in=annotations, moderation_status=Post.APPROVED,
+                    meme_labelled=False).select_related('author'):
+                _save_post_labels(post, *annotations[post.id])
+
+        logger.info(f'{len(annotations)} of {len(posts)} posts labelled...')
+        total += len(posts)
+
+    return total
+
+
+@shared_task(autoretry_for=(Exception,), retry_kwargs={'max_retries': 2}, default_retry_delay=5 * 60)
+def create_post_renditions(id):
+    from .models import Post
+    post = Post.objects.filter(id=id).first()
+
+    if not post:
+        logger.info(f'Post with id {id} not found...')
+        return RenditionsPostResponses.POST_NOT_FOUND.name
+
+    if not default_storage.exists(post.meme_file.name):
+        logger.info(f'File {post.meme_file.name} not found...')
+        return RenditionsPostResponses.POST_FILE_NOT_FOUND.name
+
+    widths = create_renditions(
+        post.meme_file.name, settings.MEME_RENDITION_WIDTHS)
+    # the file may have been replaced while the renditions were created
+    Post.objects.filter(id=id, meme_file=post.meme_file.name).update(
+        meme_renditions=widths)
+    invalidate_feed(post.author_id)
+    return RenditionsPostResponses.SUCCESS.name
+
+
+@shared_task(autoretry_for=(Exception,), retry_kwargs={'max_retries': 2}, default_retry_delay=5 * 60)
+def process_post(id):
+    from .models import Post
+    post = Post.objects.filter(id=id).select_related('author').first()
+
+    if not post:
+        logger.info(f'Post with id {id} not found...')
+        return ProcessPostResponses.POST_NOT_FOUND.name
+
+    if post.meme_processed:
+        logger.info(f'Post with id {id} already processed...')
+        return ProcessPostResponses.POST_ALREADY_PROCESSED.name
+
+    if not default_storage.exists(post.meme_file.name):
+        logger.info(f'File {post.meme_file.name} not found...')
+        return ProcessPostResponses.POST_FILE_NOT_FOUND.name
+
+    with default_storage.open(post.meme_file.name, 'rb') as staged_file:
+        meme_file = File(staged_file, os.path.basename(post.meme_file.name))
+        resized_img(meme_file, meme_file, settings.MEME_SIZE)
+        # saving moves the file out of the staging folder and deletes the staged one
+        post.meme_processed = True
+        post.meme_file.save(meme_file.name, meme_file)
+
+    return ProcessPostResponses.SUCCESS.name
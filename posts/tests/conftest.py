@@ -1,4 +1,5 @@
 import pytest
+from django.core.cache import cache
 
 
 @pytest.fixture
@@ -37,3 +38,8 @@ def long_image():
 @pytest.fixture
 def wide_image():
     return 'wide_image.jpg'
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
@@ -0,0 +1,59 @@
+import os
+import pytest
+from django.core.files.storage import default_storage
+from moderation.models import fetch_post_moderate
+from moderation.tests.test_utils import create_moderator_test_user
+from .test_create_post import create_test_user_login, perform_create_post
+from ..models import Post
+from ..tasks import process_post, ProcessPostResponses
+
+
+def create_async_test_post(client, settings, user_data, image_file):
+    settings.ASYNC_POST_INGESTION = True
+    current_path = os.path.dirname(os.path.abspath(__file__))
+    image_path = os.path.join(current_path, 'images', image_file)
+    user = create_test_user_login(client, user_data)
+
+    with open(image_path, 'rb') as img:
+        perform_create_post(client, {'meme_file': img}, 'posts:home')
+
+    return user.posts.first()
+
+
+@pytest.mark.django_db
+def test_post_staged(client, settings, valid_user_1, valid_image_file_1):
+    post = create_async_test_post(
+        client, settings, valid_user_1, valid_image_file_1)
+    assert not post.meme_processed
+    assert post.meme_file.name.startswith(f'{Post.STAGING_FOLDER}/')
+    assert default_storage.exists(post.meme_file.name)
+
+
+@pytest.mark.django_db
+def test_process_post(client, settings, valid_user_1, valid_image_file_1):
+    post = create_async_test_post(
+        client, settings, valid_user_1, valid_image_file_1)
+    staged_file = post.meme_file.name
+    assert process_post(post.id) == ProcessPostResponses.SUCCESS.name
+    post = Post.objects.get(id=post.id)
+    assert post.meme_processed
+    assert post.meme_file.name == f'{post.get_user_folder()}/{os.path.basename(staged_file)}'
+    assert default_storage.exists(post.meme_file.name)
+    assert not default_storage.exists(staged_file)
+    assert process_post(
+        post.id) == ProcessPostResponses.POST_ALREADY_PROCESSED.name
+
+
+@pytest.mark.django_db
+def test_process_post_not_found():
+    assert process_post(0) == ProcessPostResponses.POST_NOT_FOUND.name
+
+
+@pytest.mark.django_db
+def test_moderation_waits_processing(client, settings, valid_user_1, valid_user_2, valid_image_file_1):
+    post = create_async_test_post(
+        client, settings, valid_user_1, valid_image_file_1)
+    moderator = create_moderator_test_user(valid_user_2)
+    assert not fetch_post_moderate(moderator)
+    process_post(post.id)
+    assert fetch_post_moderate(moderator) == post
@@ -6,6 +6,7 @@ from django.http import JsonResponse
 from django.urls import reverse
 from django.utils import timezone
 from pytest_django.asserts import assertTemplateUsed
+from base.renditions import get_srcset
 from base.utils import inverse_case
 from moderation.models import ModerationStatus
 from moderation.tests.test_utils import create_moderator_test_user
@@ -86,8 +87,10 @@ def check_response_data(client, username, page, posts, has_next, search=''):
 def get_post_data(post):
     return {
         'profile_pic_url': post.author.profile_pic.url,
+        'profile_pic_srcset': get_srcset(post.author.profile_pic.name, post.author.profile_pic_renditions),
         'author': post.author.username,
         'meme_url': post.meme_file.url,
+        'meme_srcset': get_srcset(post.meme_file.name, post.meme_renditions),
         'post_link': reverse('posts:post-view', kwargs={'id': post.identifier}),
         'author_link': reverse('posts:author-posts', kwargs={'username': post.author.username}),
         'tags': [_.description for _ in post.tags.order_by('description')]
@@ -135,3 +138,34 @@ def test_successful_author_posts(client, valid_user_1, valid_user_2, valid_image
     check_response_data(client, user2.username, 1, [
                         posts[0]], False, 'User2 Label')
     check_response_data(client, user2.username, 1, [], False, 'User1 Label')
+
+
+@pytest.mark.django_db
+def test_author_posts_cursor(client, valid_user_1, valid_user_2, valid_image_file_1):
+    user1 = create_test_user(valid_user_1)
+    user2 = create_moderator_test_user(valid_user_2)
+    posts = []
+
+    for user in (user1, user2, user1):
+        post = create_test_post(user, valid_image_file_1)
+        status = ModerationStatus(
+            post=post, result=ModerationStatus.APPROVED, moderator_result=user2)
+        status.save()
+
+        if user == user1:
+            posts.insert(0, get_post_data(post))
+
+    settings.POSTS_PER_PAGE = 1
+    url = reverse('posts:author-posts',
+                  kwargs={'username': inverse_case(user1.username)})
+    cursor = ''
+
+    for post_data in posts:
+        querystring = urlencode({'cursor': cursor})
+        response = client.get(f'{url}?{querystring}')
+        assert response.status_code == 200
+        response_data = json.loads(response.content.decode('utf-8'))
+        assert response_data['posts'] == [post_data]
+        cursor = response_data['next_cursor']
+
+    assert cursor is None
@@ -4,10 +4,13 @@ from time import sleep
 from django.urls import reverse
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.files import File
 from django.core.files.storage import default_storage
+from django.db import IntegrityError
 from django.utils import timezone
 from pytest_django.asserts import assertTemplateUsed
-from .test_utils import create_test_user
+from .test_utils import create_test_user, create_test_post
+from ..models import Post
 
 
 UserModel = get_user_model()
@@ -66,6 +69,19 @@ def test_invalid_images(client, valid_user_1, image):
         assert user.count_posts_interval == 0
 
 
+@pytest.mark.django_db
+def test_image_too_large(client, settings, valid_user_1):
+    current_path = os.path.dirname(os.path.abspath(__file__))
+    image_path = os.path.join(current_path, 'images', 'image.PNG')
+    user = create_test_user_login(client, valid_user_1)
+    settings.MAX_IMAGE_PIXELS = 100
+
+    with open(image_path, 'rb') as img:
+        perform_create_post(client, {'meme_file': img}, 'posts:create-post')
+
+    assert user.posts.count() == 0
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize('image', [
     'image.PNG',
@@ -188,3 +204,98 @@ def test_too_long_since_last_post(client, valid_user_1, valid_image_file_1):
         assert user.count_posts_interval == 1
 
     settings.POST_WAITING_INTERVAL = post_waiting_interval
+
+
+@pytest.mark.django_db
+def test_create_post_no_storage_listing(client, monkeypatch, valid_user_1, valid_image_file_1):
+    def listdir(path):
+        raise AssertionError('Storage listed while creating a post.')
+
+    monkeypatch.setattr(default_storage, 'listdir', listdir)
+    current_path = os.path.dirname(os.path.abspath(__file__))
+    image_path = os.path.join(current_path, 'images', valid_image_file_1)
+    user = create_test_user_login(client, valid_user_1)
+
+    with open(image_path, 'rb') as img:
+        perform_create_post(client, {'meme_file': img}, 'posts:home')
+
+    post = user.posts.first()
+    assert len(post.identifier) == Post.IDENTIFIER_BYTES * 2
+    assert post.meme_file.name.startswith(
+        f'{post.get_user_folder()}/{post.identifier}')
+
+
+@pytest.mark.django_db
+def test_create_post_identifier_collision(monkeypatch, valid_user_1, valid_image_file_1, valid_image_file_2):
+    user = create_test_user(valid_user_1)
+    post = create_test_post(user, valid_image_file_1)
+
+    with default_storage.open(post.meme_file.name, 'rb') as meme_file:
+        content = meme_file.read()
+
+    files = default_storage.listdir(post.get_user_folder())[1]
+    identifiers = iter([post.identifier, 'newidentifier'])
+    monkeypatch.setattr('posts.models.secrets.token_hex',
+                        lambda nbytes: next(identifiers))
+    image_path = os.path.join(os.path.dirname(
+        os.path.abspath(__file__)), 'images', valid_image_file_2)
+
+    with open(image_path, 'rb') as img:
+        new_post = Post(author=user, meme_file=File(img, valid_image_file_2))
+        new_post.save()
+
+    assert new_post.identifier == 'newidentifier'
+    assert new_post.meme_file.name == f'{new_post.get_user_folder()}/newidentifier{os.path.splitext(valid_image_file_2)[1]}'
+    assert default_storage.exists(new_post.meme_file.name)
+    assert user.posts.count() == 2
+
+    with default_storage.open(post.meme_file.name, 'rb') as meme_file:
+        assert meme_file.read() == content
+
+    # the file is stored once, under the new identifier
+    assert sorted(default_storage.listdir(post.get_user_folder())[1]) == sorted(
+        files + [os.path.basename(new_post.meme_file.name)])
+
+
+@pytest.mark.django_db
+def test_create_post_identifier_attempts(monkeypatch, valid_user_1, valid_image_file_1):
+    user = create_test_user(valid_user_1)
+    post = create_test_post(user, valid_image_file_1)
+    monkeypatch.setattr('posts.models.secrets.token_hex',
+                        lambda nbytes: post.identifier)
+
+    with pytest.raises(IntegrityError):
+        Post(author=user, meme_file=post.meme_file.name).save()
+
+    assert user.posts.count() == 1
+
+
+@pytest.mark.django_db
+def test_post_count_reset_after_interval(valid_user_1, valid_image_file_1):
+    user = create_test_user(valid_user_1)
+    user.max_posts_interval = 3
+    user.save()
+    create_test_post(user, valid_image_file_1)
+    user = UserModel.objects.filter(id=user.id).first()
+    assert user.count_posts_interval == 1
+    UserModel.objects.filter(id=user.id).update(
+        last_post_at=timezone.now() - timezone.timedelta(seconds=settings.POST_WAITING_INTERVAL))
+    create_test_post(UserModel.objects.filter(id=user.id).first(), valid_image_file_1)
+    user = UserModel.objects.filter(id=user.id).first()
+    assert user.count_posts_interval == 1
+    assert not user.post_wait_until
+
+
+@pytest.mark.django_db
+def test_increase_post_count_query_count(django_assert_num_queries, valid_user_1):
+    user = create_test_user(valid_user_1)
+
+    for count in range(1, user.max_posts_interval + 1):
+        with django_assert_num_queries(1):
+            user.increase_post_count()
+
+    assert user.count_posts_interval == 0
+    assert user.post_wait_until > timezone.now()
+    loaded_user = UserModel.objects.filter(id=user.id).first()
+    assert (loaded_user.count_posts_interval, loaded_user.post_wait_until, loaded_user.last_post_at) == (
+        user.count_posts_interval, user.post_wait_until, user.last_post_at)
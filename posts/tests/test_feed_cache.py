@@ -0,0 +1,156 @@
+import json
+import pytest
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.checks import run_checks
+from django.urls import reverse
+from moderation.models import ModerationStatus
+from moderation.tests.test_utils import create_moderator_test_user, create_test_denial_reason
+from .test_utils import create_test_user, create_test_post
+from ..feed_cache import get_cached_feed, get_feed_cache_stats, invalidate_feed
+from ..models import Post, PostTag, get_approved_posts, get_approved_posts_cursor
+
+
+def get_response_data(client, url, search=''):
+    querystring = urlencode({'page': 1, 'search': search})
+    response = client.get(f'{url}?{querystring}')
+    assert response.status_code == 200
+    return json.loads(response.content.decode('utf-8'))
+
+
+def approve_test_post(post, moderator):
+    status = ModerationStatus(
+        post=post, result=ModerationStatus.APPROVED, moderator_result=moderator)
+    status.save()
+    return status
+
+
+@pytest.mark.django_db
+def test_cache_hit(client, django_assert_num_queries, valid_user_1, valid_user_2, valid_image_file_1):
+    user1 = create_test_user(valid_user_1)
+    user2 = create_moderator_test_user(valid_user_2)
+    approve_test_post(create_test_post(user1, valid_image_file_1), user2)
+    settings.POSTS_PER_PAGE = 5
+    url = reverse('posts:home')
+    response_data = get_response_data(client, url)
+    assert len(response_data['posts']) == 1
+    assert get_feed_cache_stats() == {'hits': 0, 'misses': 1}
+
+    with django_assert_num_queries(0):
+        assert get_response_data(client, url) == response_data
+
+    assert get_feed_cache_stats() == {'hits': 1, 'misses': 1}
+
+
+@pytest.mark.django_db
+def test_search_not_cached(client, valid_user_1, valid_user_2, valid_image_file_1):
+    user1 = create_test_user(valid_user_1)
+    user2 = create_moderator_test_user(valid_user_2)
+    approve_test_post(create_test_post(user1, valid_image_file_1), user2)
+    url = reverse('posts:home')
+    get_response_data(client, url, user1.username.lower())
+    get_response_data(client, url, user1.username.lower())
+    assert get_feed_cache_stats() == {'hits': 0, 'misses': 0}
+
+
+@pytest.mark.django_db
+def test_invalidate_moderation(client, valid_user_1, valid_user_2, valid_image_file_1):
+    user1 = create_test_user(valid_user_1)
+    user2 = create_moderator_test_user(valid_user_2)
+    post = create_test_post(user1, valid_image_file_1)
+    settings.POSTS_PER_PAGE = 5
+    urls = [reverse('posts:home'), reverse(
+        'posts:author-posts', kwargs={'username': user1.username})]
+
+    for url in urls:
+        assert get_response_data(client, url)['posts'] == []
+
+    approve_test_post(post, user2)
+
+    for url in urls:
+        assert len(get_response_data(client, url)['posts']) == 1
+
+    reason = create_test_denial_reason('test denial reason', user2)
+    status = ModerationStatus(post=post, result=ModerationStatus.DENIED,
+                              moderator_result=user2, denial_reason=reason)
+    status.save()
+
+    for url in urls:
+        assert get_response_data(client, url)['posts'] == []
+
+    status.delete()
+
+    for url in urls:
+        assert len(get_response_data(client, url)['posts']) == 1
+
+
+@pytest.mark.django_db
+def test_invalidate_tags(client, valid_user_1, valid_user_2, valid_image_file_1):
+    user1 = create_test_user(valid_user_1)
+    user2 = create_moderator_test_user(valid_user_2)
+    post = create_test_post(user1, valid_image_file_1)
+    approve_test_post(post, user2)
+    url = reverse('posts:home')
+    assert get_response_data(client, url)['posts'][0]['tags'] == []
+    post_tag = PostTag(post=post, description='label')
+    post_tag.save()
+    assert get_response_data(client, url)['posts'][0]['tags'] == ['label']
+    post_tag.delete()
+    assert get_response_data(client, url)['posts'][0]['tags'] == []
+
+
+@pytest.mark.django_db
+def test_invalidate_post_deleted(client, valid_user_1, valid_user_2, valid_image_file_1):
+    user1 = create_test_user(valid_user_1)
+    user2 = create_moderator_test_user(valid_user_2)
+    post = create_test_post(user1, valid_image_file_1)
+    approve_test_post(post, user2)
+    url = reverse('posts:author-posts', kwargs={'username': user1.username})
+    assert len(get_response_data(client, url)['posts']) == 1
+    post.delete()
+    assert get_response_data(client, url)['posts'] == []
+
+
+@pytest.mark.django_db
+def test_invalidate_on_commit(django_capture_on_commit_callbacks, valid_user_1, valid_user_2,
+                              valid_image_file_1):
+    user1 = create_test_user(valid_user_1)
+    user2 = create_moderator_test_user(valid_user_2)
+    post = create_test_post(user1, valid_image_file_1)
+    approve_test_post(post, user2)
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        invalidate_feed(user1.id)
+        # a request served before the commit caches the old rows under the new version
+        assert len(get_cached_feed(get_approved_posts, 1, '')['posts']) == 1
+        Post.objects.filter(id=post.id).update(moderation_status=Post.DENIED)
+
+    assert len(callbacks) > 0
+    assert get_cached_feed(get_approved_posts, 1, '')['posts'] == []
+
+
+@pytest.mark.django_db
+def test_page_key_validated(valid_user_1, valid_user_2, valid_image_file_1):
+    user1 = create_test_user(valid_user_1)
+    user2 = create_moderator_test_user(valid_user_2)
+    approve_test_post(create_test_post(user1, valid_image_file_1), user2)
+    assert len(get_cached_feed(get_approved_posts, '1', '')['posts']) == 1
+    assert len(get_cached_feed(get_approved_posts, '01', '')['posts']) == 1
+    assert get_feed_cache_stats() == {'hits': 1, 'misses': 1}
+    assert get_cached_feed(get_approved_posts_cursor, 'invalid', '')['posts'] == []
+    assert get_cached_feed(get_approved_posts_cursor, 'invalid', '')['posts'] == []
+    assert get_feed_cache_stats() == {'hits': 1, 'misses': 1}
+
+
+def test_feed_cache_check(settings):
+    settings.TEST_MODE = False
+    settings.DEBUG = False
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    assert [_.id for _ in run_checks(tags=['caches'])] == ['posts.W001']
+    settings.DEBUG = True
+    assert not run_checks(tags=['caches'])
+    settings.DEBUG = False
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache', 'LOCATION': '127.0.0.1:11211'}}
+    assert not run_checks(tags=['caches'])
@@ -2,13 +2,17 @@ import json
 import pytest
 from urllib.parse import urlencode
 from django.conf import settings
+from django.db import connection
 from django.http import JsonResponse
 from django.urls import reverse
+from django.utils import timezone
 from pytest_django.asserts import assertTemplateUsed
+from base.renditions import get_srcset
 from moderation.models import ModerationStatus, fetch_post_moderate
 from moderation.tests.test_utils import create_moderator_test_user, create_test_denial_reason
 from .test_utils import create_test_user, create_test_post
-from ..models import PostTag
+from ..models import (Post, PostTag, SORT_RELEVANCE, filter_feed_cursor, get_approved_posts,
+                      get_approved_posts_cursor)
 
 
 def test_render_template(client):
@@ -34,11 +38,29 @@ def check_response_data(client, page, posts, has_next, search=''):
     assert response_data['posts'] == posts
 
 
+def get_cursor_response_data(client, cursor, search=''):
+    params = {
+        'cursor': cursor,
+        'search': search
+    }
+
+    url = reverse('posts:home')
+    querystring = urlencode(params)
+    response = client.get(f'{url}?{querystring}')
+    assert response.status_code == 200
+    assert type(response) == JsonResponse
+    response_data = json.loads(response.content.decode('utf-8'))
+    assert 'has_next' not in response_data
+    return response_data
+
+
 def get_post_data(post):
     return {
         'profile_pic_url': post.author.profile_pic.url,
+        'profile_pic_srcset': get_srcset(post.author.profile_pic.name, post.author.profile_pic_renditions),
         'author': post.author.username,
         'meme_url': post.meme_file.url,
+        'meme_srcset': get_srcset(post.meme_file.name, post.meme_renditions),
         'post_link': reverse('posts:post-view', kwargs={'id': post.identifier}),
         'author_link': reverse('posts:author-posts', kwargs={'username': post.author.username}),
         'tags': [_.description for _ in post.tags.order_by('description')]
@@ -91,3 +113,145 @@ def test_get_posts(client, valid_user_1, valid_user_2, valid_image_file_1):
         client, 1, [posts[0]], False, f'User2 Text {user2.username.lower()}')
     check_response_data(
         client, 1, [posts[1]], False, f'User1 Text {user1.username.lower()}')
+
+
+def create_approved_test_post(user, moderator, image_file):
+    post = create_test_post(user, image_file)
+    status = ModerationStatus(
+        post=post, result=ModerationStatus.APPROVED, moderator_result=moderator)
+    status.save()
+    return post
+
+
+@pytest.mark.django_db
+def test_get_posts_cursor(client, valid_user_1, valid_user_2, valid_image_file_1):
+    user1 = create_test_user(valid_user_1)
+    user2 = create_moderator_test_user(valid_user_2)
+    create_test_post(user1, valid_image_file_1)
+    posts = []
+
+    for _ in range(3):
+        post = create_approved_test_post(user1, user2, valid_image_file_1)
+        posts.insert(0, get_post_data(post))
+
+    settings.POSTS_PER_PAGE = 2
+    response_data = get_cursor_response_data(client, '')
+    assert response_data['posts'] == posts[:2]
+    assert response_data['next_cursor']
+    response_data = get_cursor_response_data(
+        client, response_data['next_cursor'])
+    assert response_data['posts'] == posts[2:]
+    assert response_data['next_cursor'] is None
+    response_data = get_cursor_response_data(
+        client, '', user2.username.lower())
+    assert response_data['posts'] == []
+    assert response_data['next_cursor'] is None
+
+
+@pytest.mark.django_db
+def test_get_posts_cursor_same_approved_at(client, valid_user_1, valid_user_2, valid_image_file_1):
+    user1 = create_test_user(valid_user_1)
+    user2 = create_moderator_test_user(valid_user_2)
+    posts = [create_approved_test_post(user1, user2, valid_image_file_1)
+             for _ in range(3)]
+    approved_at = timezone.now()
+    Post.objects.update(approved_at=approved_at)
+    settings.POSTS_PER_PAGE = 1
+    cursor = ''
+    fetched = []
+
+    while True:
+        response_data = get_cursor_response_data(client, cursor)
+        fetched.extend(response_data['posts'])
+        cursor = response_data['next_cursor']
+
+        if not cursor:
+            break
+
+    posts.sort(key=lambda post: post.id, reverse=True)
+    assert fetched == [get_post_data(post) for post in posts]
+
+
+@pytest.mark.django_db
+def test_get_posts_cursor_index_range(valid_user_1, valid_user_2, valid_image_file_1):
+    user1 = create_test_user(valid_user_1)
+    user2 = create_moderator_test_user(valid_user_2)
+    post = create_approved_test_post(user1, user2, valid_image_file_1)
+    posts = filter_feed_cursor(Post.objects.filter(
+        moderation_status=Post.APPROVED), post.approved_at, post.id).order_by('-approved_at', '-id')
+
+    with connection.cursor() as cursor:
+        cursor.execute('SET LOCAL enable_seqscan = off')
+
+    # the scan starts at the cursor, so deep pages cost the same as the first one
+    plan = posts.explain()
+    index_cond = next(_ for _ in plan.splitlines() if 'Index Cond' in _)
+    assert 'approved_at' in index_cond
+
+
+@pytest.mark.django_db
+def test_get_posts_cursor_approved_at_missing(client, valid_user_1, valid_user_2, valid_image_file_1):
+    user1 = create_test_user(valid_user_1)
+    user2 = create_moderator_test_user(valid_user_2)
+    posts = [create_approved_test_post(user1, user2, valid_image_file_1)
+             for _ in range(2)]
+    Post.objects.filter(id=posts[1].id).update(approved_at=None)
+    settings.POSTS_PER_PAGE = 1
+    response_data = get_cursor_response_data(client, '')
+    assert response_data['posts'] == [get_post_data(posts[0])]
+    assert response_data['next_cursor'] is None
+
+
+@pytest.mark.django_db
+def test_get_posts_invalid_cursor(client, valid_user_1, valid_user_2, valid_image_file_1):
+    user1 = create_test_user(valid_user_1)
+    user2 = create_moderator_test_user(valid_user_2)
+    create_approved_test_post(user1, user2, valid_image_file_1)
+    response_data = get_cursor_response_data(client, 'invalid-cursor')
+    assert response_data['posts'] == []
+    assert response_data['next_cursor'] is None
+
+
+@pytest.mark.django_db
+def test_get_posts_query_count(django_assert_num_queries, valid_user_1, valid_user_2, valid_image_file_1):
+    user1 = create_test_user(valid_user_1)
+    user2 = create_moderator_test_user(valid_user_2)
+
+    for i in range(4):
+        author = user1 if i % 2 else user2
+        post = create_approved_test_post(author, user2, valid_image_file_1)
+        PostTag(post=post, description=f'label {i}').save()
+        PostTag(post=post, description=f'other label {i}').save()
+
+    settings.POSTS_PER_PAGE = 4
+
+    with django_assert_num_queries(3):
+        response = get_approved_posts(1, '')
+
+    assert len(response['posts']) == 4
+
+    with django_assert_num_queries(2):
+        response = get_approved_posts_cursor('', '')
+
+    assert len(response['posts']) == 4
+
+
+@pytest.mark.django_db
+def test_get_posts_sort_relevance(client, valid_user_1, valid_user_2, valid_image_file_1):
+    user1 = create_test_user(valid_user_1)
+    user2 = create_moderator_test_user(valid_user_2)
+    post = create_approved_test_post(user1, user2, valid_image_file_1)
+    PostTag(post=post, description='cat').save()
+    post_label = Post.objects.get(id=post.id)
+    post = create_approved_test_post(user1, user2, valid_image_file_1)
+    post.meme_text = 'cat'
+    post.save()
+    post_text = Post.objects.get(id=post.id)
+    settings.POSTS_PER_PAGE = 2
+    url = reverse('posts:home')
+
+    for sort, posts in (('', [post_text, post_label]), (SORT_RELEVANCE, [post_label, post_text])):
+        querystring = urlencode({'page': 1, 'search': 'cat', 'sort': sort})
+        response = client.get(f'{url}?{querystring}')
+        response_data = json.loads(response.content.decode('utf-8'))
+        assert response_data['posts'] == [get_post_data(_) for _ in posts]
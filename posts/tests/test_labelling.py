@@ -0,0 +1,125 @@
+import pytest
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from moderation.models import ModerationStatus
+from moderation.tests.test_utils import create_moderator_test_user
+from .test_utils import create_test_user, create_test_post
+from ..google_cloud.fake_client import FakeImageAnnotatorClient
+from ..google_cloud.utils import get_client, set_client
+from ..models import Post
+from ..tasks import LabelPostResponses, get_post_labels, label_pending_posts
+
+
+@pytest.fixture
+def fake_client():
+    client = FakeImageAnnotatorClient(
+        labels=['first tag', 'second tag'], text='meme\ntext')
+    set_client(client)
+    yield client
+    set_client(None)
+
+
+def create_approved_test_posts(user, moderator, image_file, total):
+    posts = []
+
+    for _ in range(total):
+        post = create_test_post(user, image_file)
+        status = ModerationStatus(
+            post=post, result=ModerationStatus.APPROVED, moderator_result=moderator)
+        status.save()
+        posts.append(post)
+
+    return posts
+
+
+def test_shared_client(fake_client):
+    assert get_client() is fake_client
+    assert get_client() is get_client()
+
+
+@pytest.mark.django_db
+def test_get_post_labels(fake_client, valid_user_1, valid_user_2, valid_image_file_1):
+    user1 = create_test_user(valid_user_1)
+    user2 = create_moderator_test_user(valid_user_2)
+    post = create_approved_test_posts(user1, user2, valid_image_file_1, 1)[0]
+    assert get_post_labels(post.id) == LabelPostResponses.SUCCESS.name
+    post = Post.objects.get(id=post.id)
+    assert post.meme_labelled
+    assert post.meme_text == 'meme text'
+    assert post.meme_labels == 'first tag second tag'
+
+
+@pytest.mark.django_db
+def test_label_pending_posts(settings, fake_client, valid_user_1, valid_user_2, valid_image_file_1):
+    settings.VISION_BATCH_SIZE = 2
+    user1 = create_test_user(valid_user_1)
+    user2 = create_moderator_test_user(valid_user_2)
+    posts = create_approved_test_posts(user1, user2, valid_image_file_1, 3)
+    waiting_post = create_test_post(user1, valid_image_file_1)
+    assert label_pending_posts() == 3
+    assert fake_client.calls == 2
+
+    for post in posts:
+        post = Post.objects.get(id=post.id)
+        assert post.meme_labelled
+        assert post.meme_text == 'meme text'
+        assert post.meme_labels == 'first tag second tag'
+
+    assert not Post.objects.get(id=waiting_post.id).meme_labelled
+    assert label_pending_posts() == 0
+    assert fake_client.calls == 2
+
+
+@pytest.mark.django_db
+def test_label_pending_posts_max(fake_client, valid_user_1, valid_user_2, valid_image_file_1):
+    user1 = create_test_user(valid_user_1)
+    user2 = create_moderator_test_user(valid_user_2)
+    create_approved_test_posts(user1, user2, valid_image_file_1, 3)
+    assert label_pending_posts(2) == 2
+    assert fake_client.calls == 1
+    assert Post.objects.filter(meme_labelled=False).count() == 1
+
+
+@pytest.mark.django_db
+def test_label_pending_posts_attempts(settings, fake_client, valid_user_1, valid_user_2, valid_image_file_1):
+    settings.LABEL_POST_ATTEMPTS = 2
+    user1 = create_test_user(valid_user_1)
+    user2 = create_moderator_test_user(valid_user_2)
+    post = create_approved_test_posts(user1, user2, valid_image_file_1, 1)[0]
+    default_storage.delete(post.meme_file.name)
+    assert label_pending_posts() == 1
+    assert fake_client.calls == 0
+    post = Post.objects.get(id=post.id)
+    assert not post.meme_labelled
+    assert post.meme_label_attempts == 1
+    # failed posts wait for the retry interval
+    assert label_pending_posts() == 0
+    Post.objects.filter(id=post.id).update(meme_label_attempted_at=timezone.now() - timezone.timedelta(
+        seconds=settings.LABEL_POST_RETRY_INTERVAL))
+    assert label_pending_posts() == 1
+    Post.objects.filter(id=post.id).update(meme_label_attempted_at=None)
+    assert label_pending_posts() == 0
+    assert Post.objects.get(id=post.id).meme_label_attempts == 2
+
+
+@pytest.mark.django_db
+def test_label_pending_posts_denied_meanwhile(fake_client, valid_user_1, valid_user_2, valid_image_file_1):
+    user1 = create_test_user(valid_user_1)
+    user2 = create_moderator_test_user(valid_user_2)
+    post = create_approved_test_posts(user1, user2, valid_image_file_1, 1)[0]
+    batch_annotate_images = fake_client.batch_annotate_images
+
+    def deny_post(requests):
+        Post.objects.filter(id=post.id).update(moderation_status=Post.DENIED)
+        return batch_annotate_images(requests)
+
+    fake_client.batch_annotate_images = deny_post
+    assert label_pending_posts() == 1
+    post = Post.objects.get(id=post.id)
+    assert not post.meme_labelled
+    assert not post.meme_labels
+
+
+def test_label_pending_posts_scheduled(settings):
+    assert any(_['task'] == 'posts.tasks.label_pending_posts'
+               for _ in settings.CELERY_BEAT_SCHEDULE.values())
@@ -1,7 +1,9 @@
 import pytest
 from django.db.utils import IntegrityError
+from django.urls import reverse
+from users.tests.test_utils import create_admin_test_user
 from .test_utils import create_test_user, create_test_post
-from ..models import PostTag, Post
+from ..models import PostTag, Post, add_post_tags
 
 
 @pytest.mark.django_db
@@ -48,3 +50,54 @@ def test_duplicated_tags(client, valid_user_1, valid_image_file_1):
     with pytest.raises(IntegrityError):
         post_tag = PostTag(post=post, description=tag)
         post_tag.save()
+
+
+@pytest.mark.django_db
+def test_add_post_tags(django_assert_num_queries, valid_user_1, valid_image_file_1):
+    user = create_test_user(valid_user_1)
+    post = create_test_post(user, valid_image_file_1)
+    tags = ['third tag', 'first tag', 'second tag', 'first tag']
+
+    with django_assert_num_queries(3):
+        add_post_tags(post, tags)
+
+    post = Post.objects.filter(id=post.id).first()
+    assert post.tags.count() == 3
+    assert post.meme_labels == 'first tag second tag third tag'
+    assert 'second tag' in post.meme_search
+    add_post_tags(post, ['first tag', 'fourth tag'])
+    post = Post.objects.filter(id=post.id).first()
+    assert post.meme_labels == 'first tag fourth tag second tag third tag'
+
+
+@pytest.mark.django_db
+def test_admin_post_tags(client, valid_user_1, valid_user_2, valid_image_file_1):
+    user = create_test_user(valid_user_1)
+    admin = create_admin_test_user(valid_user_2)
+    post = create_test_post(user, valid_image_file_1)
+    add_post_tags(post, ['first tag', 'second tag', 'third tag'])
+    tags = list(post.tags.order_by('description'))
+    client.force_login(admin)
+    data = {
+        'author': user.id,
+        'moderation_status': post.moderation_status,
+        'tags-TOTAL_FORMS': 4,
+        'tags-INITIAL_FORMS': 3,
+        'tags-MIN_NUM_FORMS': 0,
+        'tags-MAX_NUM_FORMS': 1000,
+        'tags-3-post': post.id,
+        'tags-3-description': 'fourth tag',
+    }
+
+    for idx, tag in enumerate(tags):
+        data[f'tags-{idx}-id'] = tag.id
+        data[f'tags-{idx}-post'] = post.id
+        data[f'tags-{idx}-description'] = tag.description
+
+    data['tags-1-description'] = 'modified tag'
+    data['tags-2-DELETE'] = 'on'
+    url = reverse('admin:posts_post_change', args=[post.id])
+    response = client.post(url, data)
+    assert response.status_code == 302
+    post = Post.objects.filter(id=post.id).first()
+    assert post.meme_labels == 'first tag fourth tag modified tag'
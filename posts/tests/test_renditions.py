@@ -0,0 +1,89 @@
+import os
+import pytest
+from django.core.files import File
+from django.core.files.storage import default_storage
+from PIL import Image
+from base.renditions import get_rendition_name, get_srcset
+from users.tasks import create_profile_pic_renditions, RenditionsProfilePicResponses
+from .test_utils import create_test_user, create_test_post
+from ..models import Post, _get_approved_posts_data
+from ..tasks import create_post_renditions, RenditionsPostResponses
+
+
+def get_image_path(image_file):
+    current_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(current_path, 'images', image_file)
+
+
+@pytest.mark.django_db
+def test_post_renditions(valid_user_1, valid_image_file_1):
+    user = create_test_user(valid_user_1)
+    post = create_test_post(user, valid_image_file_1)
+    assert create_post_renditions(
+        post.id) == RenditionsPostResponses.SUCCESS.name
+    post = Post.objects.get(id=post.id)
+    assert post.meme_renditions == [250, 256]
+
+    for width in post.meme_renditions:
+        name = get_rendition_name(post.meme_file.name, width)
+
+        with default_storage.open(name, 'rb') as file:
+            img = Image.open(file)
+            assert img.format == 'WEBP'
+            assert img.width == width
+
+    assert _get_approved_posts_data([post])[0]['meme_srcset'] == [
+        f'{default_storage.url(get_rendition_name(post.meme_file.name, width))} {width}w'
+        for width in post.meme_renditions]
+
+
+@pytest.mark.django_db
+def test_post_renditions_deleted(valid_user_1, valid_image_file_1, valid_image_file_2):
+    user = create_test_user(valid_user_1)
+    post = create_test_post(user, valid_image_file_1)
+    create_post_renditions(post.id)
+    post = Post.objects.get(id=post.id)
+    names = [get_rendition_name(post.meme_file.name, _)
+             for _ in post.meme_renditions]
+    assert all(default_storage.exists(_) for _ in names)
+    post.meme_file.save(valid_image_file_2, File(
+        open(get_image_path(valid_image_file_2), 'rb')))
+    assert post.meme_renditions == []
+    assert not any(default_storage.exists(_) for _ in names)
+    create_post_renditions(post.id)
+    post = Post.objects.get(id=post.id)
+    names = [get_rendition_name(post.meme_file.name, _)
+             for _ in post.meme_renditions]
+    post.delete()
+    assert not any(default_storage.exists(_) for _ in names)
+
+
+@pytest.mark.django_db
+def test_post_renditions_not_found(valid_user_1, valid_image_file_1):
+    user = create_test_user(valid_user_1)
+    post = create_test_post(user, valid_image_file_1)
+    assert create_post_renditions(
+        post.id + 1) == RenditionsPostResponses.POST_NOT_FOUND.name
+    default_storage.delete(post.meme_file.name)
+    assert create_post_renditions(
+        post.id) == RenditionsPostResponses.POST_FILE_NOT_FOUND.name
+
+
+@pytest.mark.django_db
+def test_profile_pic_renditions(valid_user_1, valid_image_file_1):
+    user = create_test_user(valid_user_1)
+    assert create_profile_pic_renditions(
+        user.id) == RenditionsProfilePicResponses.PROFILE_PIC_NOT_FOUND.name
+    user.profile_pic.save(valid_image_file_1, File(
+        open(get_image_path(valid_image_file_1), 'rb')))
+    assert create_profile_pic_renditions(
+        user.id) == RenditionsProfilePicResponses.SUCCESS.name
+    user.refresh_from_db()
+    assert user.profile_pic_renditions == [64, 128]
+    names = [get_rendition_name(user.profile_pic.name, _)
+             for _ in user.profile_pic_renditions]
+    assert all(default_storage.exists(_) for _ in names)
+    assert get_srcset(user.profile_pic.name, user.profile_pic_renditions) == [
+        f'{default_storage.url(name)} {width}w' for name, width in zip(names, [64, 128])]
+    user.delete()
+    assert not any(default_storage.exists(_) for _ in names)
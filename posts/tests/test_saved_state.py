@@ -0,0 +1,67 @@
+import os
+import pytest
+from django.core.files import File
+from django.core.files.storage import default_storage
+from .test_utils import create_test_user, create_test_post
+from ..models import Post
+
+
+@pytest.mark.django_db
+def test_saved_state_from_db(valid_user_1, valid_image_file_1):
+    user = create_test_user(valid_user_1)
+    post = create_test_post(user, valid_image_file_1)
+    post = Post.objects.get(id=post.id)
+    assert post.get_saved_state() == {
+        'meme_file': post.meme_file.name,
+        'moderation_status': Post.WAITING_MODERATION,
+        'meme_text': None,
+        'meme_labels': None
+    }
+
+
+@pytest.mark.django_db
+def test_save_loaded_post_query_count(django_assert_num_queries, valid_user_1, valid_image_file_1):
+    user = create_test_user(valid_user_1)
+    post = create_test_post(user, valid_image_file_1)
+    post = Post.objects.select_related('author').get(id=post.id)
+    post.meme_text = 'post text'
+
+    with django_assert_num_queries(1):
+        post.save()
+
+    assert post.get_saved_state()['meme_text'] == 'post text'
+    assert 'post text' in Post.objects.get(id=post.id).meme_search
+
+
+@pytest.mark.django_db
+def test_save_deferred_post_query_count(django_assert_num_queries, valid_user_1, valid_image_file_1):
+    user = create_test_user(valid_user_1)
+    post = create_test_post(user, valid_image_file_1)
+    post = Post(id=post.id, author=user, identifier=post.identifier, created_at=post.created_at,
+                meme_file=post.meme_file.name, meme_search=post.meme_search)
+
+    with django_assert_num_queries(2):
+        post.save()
+
+
+@pytest.mark.django_db
+def test_change_loaded_post_img(valid_user_1, valid_image_file_1, valid_image_file_2):
+    user = create_test_user(valid_user_1)
+    post = create_test_post(user, valid_image_file_1)
+    old_file = post.meme_file.name
+    post = Post.objects.get(id=post.id)
+    current_path = os.path.dirname(os.path.abspath(__file__))
+    image_path = os.path.join(current_path, 'images', valid_image_file_2)
+    post.meme_file.save(valid_image_file_2, File(open(image_path, 'rb')))
+    assert not default_storage.exists(old_file)
+    assert default_storage.exists(post.meme_file.name)
+    assert post.get_saved_state()['meme_file'] == post.meme_file.name
+
+
+@pytest.mark.django_db
+def test_refresh_from_db(valid_user_1, valid_image_file_1):
+    user = create_test_user(valid_user_1)
+    post = create_test_post(user, valid_image_file_1)
+    Post.objects.filter(id=post.id).update(meme_text='post text')
+    post.refresh_from_db()
+    assert post.get_saved_state()['meme_text'] == 'post text'
@@ -9,7 +9,7 @@ from pytest_django.asserts import assertTemplateUsed
 from moderation.models import ModerationStatus, fetch_post_moderate
 from moderation.tests.test_utils import create_moderator_test_user, create_test_denial_reason
 from .test_utils import create_test_user, create_test_post
-from ..models import Post
+from ..models import Post, get_user_posts
 
 
 @pytest.mark.django_db
@@ -131,3 +131,43 @@ def test_get_user_posts(client, valid_user_1, valid_user_2, valid_image_file_1):
     check_response_data(client, 3, client_timezone, [posts[2]], True)
     check_response_data(client, 4, client_timezone, [posts[3]], False)
     check_response_data(client, 5, client_timezone, [], False)
+
+
+@pytest.mark.django_db
+def test_get_user_posts_query_count(django_assert_num_queries, valid_user_1, valid_user_2, valid_image_file_1):
+    user1 = create_test_user(valid_user_1)
+    user2 = create_moderator_test_user(valid_user_2)
+    reason = create_test_denial_reason('test denial reason', user2)
+
+    for result in (ModerationStatus.DENIED, ModerationStatus.APPROVED, ModerationStatus.DENIED):
+        post = create_test_post(user1, valid_image_file_1)
+        status = ModerationStatus(post=post, result=result, moderator_result=user2,
+                                  denial_reason=reason if result == ModerationStatus.DENIED else None)
+        status.save()
+
+    create_test_post(user1, valid_image_file_1)
+    fetch_post_moderate(user2)
+    create_test_post(user1, valid_image_file_1)
+    settings.POSTS_PER_PAGE = 6
+
+    with django_assert_num_queries(3):
+        response = get_user_posts(user1, 1, 180)
+
+    assert [_['is_denied'] for _ in response['posts']] == [
+        False, False, True, False, True]
+    assert all(_['status_created_at'] for _ in response['posts'][1:])
+    assert response['posts'][2]['denial_reason'] == reason.description
+
+
+@pytest.mark.django_db
+def test_get_user_posts_date_format(valid_user_1, valid_image_file_1):
+    user = create_test_user(valid_user_1)
+    post = create_test_post(user, valid_image_file_1)
+    client_timezone = -330
+
+    for month in range(1, 13):
+        created_at = timezone.datetime(2021, month, 3, 23, 5, tzinfo=timezone.utc)
+        Post.objects.filter(id=post.id).update(created_at=created_at)
+        response = get_user_posts(user, 1, client_timezone)
+        assert response['posts'][0]['post_created_at'] == (
+            created_at - timezone.timedelta(minutes=client_timezone)).strftime(settings.DATE_TIME_DISPLAY_FORMAT)
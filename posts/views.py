@@ -5,7 +5,9 @@ from django.http import JsonResponse
 from django.urls import reverse_lazy
 from django.views.generic import TemplateView, CreateView, DetailView
 from base.views import PrgView
-from .models import Post, get_user_posts, get_approved_posts, get_approved_post, get_author
+from .feed_cache import get_cached_feed
+from .models import (Post, get_user_posts, get_approved_posts, get_approved_posts_cursor,
+                     get_approved_post, get_author)
 from .forms import CreatePostForm
 
 
@@ -14,9 +16,14 @@ class HomeView(TemplateView):
     http_method_names = ['get']
 
     def get(self, request, *args, **kwargs):
+        if 'cursor' in request.GET:
+            data = get_cached_feed(get_approved_posts_cursor, request.GET.get(
+                'cursor'), request.GET.get('search', ''))
+            return JsonResponse(data)
+
         if 'page' in request.GET:
-            data = get_approved_posts(request.GET.get(
-                'page'), request.GET.get('search', ''))
+            data = get_cached_feed(get_approved_posts, request.GET.get(
+                'page'), request.GET.get('search', ''), sort=request.GET.get('sort'))
             return JsonResponse(data)
 
         return super().get(request, *args, **kwargs)
@@ -38,10 +45,16 @@ class AuthorPostsView(DetailView):
         return context
 
     def get(self, request, *args, **kwargs):
+        if 'cursor' in request.GET:
+            author = self.get_object()
+            data = get_cached_feed(get_approved_posts_cursor, request.GET.get(
+                'cursor'), request.GET.get('search', ''), author)
+            return JsonResponse(data)
+
         if 'page' in request.GET:
             author = self.get_object()
-            data = get_approved_posts(request.GET.get(
-                'page'), request.GET.get('search', ''), author)
+            data = get_cached_feed(get_approved_posts, request.GET.get(
+                'page'), request.GET.get('search', ''), author, sort=request.GET.get('sort'))
             return JsonResponse(data)
 
         return super().get(request, *args, **kwargs)
@@ -0,0 +1,7 @@
+from django.core.management.base import BaseCommand
+from services.user_deleter import run_user_deleter
+
+
+class Command(BaseCommand):
+    def handle(self, *args, **options):
+        run_user_deleter()
@@ -0,0 +1,7 @@
+from celery import shared_task
+from .user_deleter import run_user_deleter
+
+
+@shared_task
+def delete_users():
+    return run_user_deleter()
@@ -1,62 +1,68 @@
 from time import time
-from threading import Thread, Event
+from django.conf import settings
+from django.db import connection
 from django.utils import timezone
 from users.models import (get_not_activated_users_expired_links, get_users_execute_delete_request,
-                          execute_user_delete_request)
+                          delete_users, execute_users_delete_request)
 
-user_deleter = Event()
+# arbitrary key shared by every process running the sweep
+USER_DELETER_LOCK_ID = 720365
 
 
-def delete_not_activated_users_expired_links():
-    print(f'{timezone.now()}: Checking for not activated users with expired links...')
-    users = get_not_activated_users_expired_links()
+def _delete_in_chunks(get_users, delete_users):
     count = 0
 
-    for user in users:
-        try:
-            user.delete()
-            count += 1
-        except:
-            pass
+    while True:
+        ids = list(get_users().values_list(
+            'id', flat=True)[:settings.USER_DELETER_CHUNK_SIZE])
 
-    if len(users) > 0:
-        print(f'{count}/{len(users)} users deleted...')
+        if not ids:
+            return count
 
+        count += delete_users(get_users().filter(id__in=ids))
 
-def delete_users_delete_request():
-    print(f'{timezone.now()}: Checking for users with expired delete requests...')
-    users = get_users_execute_delete_request()
-    count = 0
 
-    for user in users:
-        try:
-            execute_user_delete_request(user)
-            count += 1
-        except:
-            pass
+def delete_not_activated_users_expired_links():
+    print(f'{timezone.now()}: Checking for not activated users with expired links...')
+    count = _delete_in_chunks(
+        get_not_activated_users_expired_links, delete_users)
 
-    if len(users) > 0:
-        print(f'{count}/{len(users)} users with delete request executed...')
+    if count > 0:
+        print(f'{count} users deleted...')
 
+    return count
 
-def __delete_users():
-    INTERVAL = 5 * 60  # 5 minutes
 
-    while True:
-        start = time()
-        try:
-            delete_not_activated_users_expired_links()
-            delete_users_delete_request()
-        except:
-            print('Error while fetching users to delete...')
+def delete_users_delete_request():
+    print(f'{timezone.now()}: Checking for users with expired delete requests...')
+    count = _delete_in_chunks(
+        get_users_execute_delete_request, execute_users_delete_request)
+
+    if count > 0:
+        print(f'{count} users with delete request executed...')
 
-        duration = time() - start
+    return count
 
-        if duration < INTERVAL:
-            user_deleter.clear()
-            user_deleter.wait(INTERVAL - duration)
 
+def run_user_deleter():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_lock(%s)',
+                       [USER_DELETER_LOCK_ID])
 
-def start_user_deleter():
-    Thread(name='Check users to delete',
-           target=__delete_users, daemon=True).start()
+        if not cursor.fetchone()[0]:
+            print(f'{timezone.now()}: User deleter already running...')
+            return None
+
+        try:
+            start = time()
+            result = {
+                'expired_links': delete_not_activated_users_expired_links(),
+                'delete_requests': delete_users_delete_request()
+            }
+            result['duration'] = time() - start
+            print(f'{timezone.now()}: User deleter finished in {result["duration"]:.2f}s. '
+                  f'Expired links: {result["expired_links"]}. Delete requests: {result["delete_requests"]}.')
+            return result
+        finally:
+            cursor.execute('SELECT pg_advisory_unlock(%s)',
+                           [USER_DELETER_LOCK_ID])
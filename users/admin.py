@@ -22,7 +22,7 @@ class UserAdmin(BaseUserAdmin):
         (None, {'fields': ('username', 'email',
                            'profile_pic', 'current_password', 'new_password', 'delete_requested_at', 'deleted')}),
         ('Permissions', {
-            'fields': ('activated_at', 'banned', 'banned_until', 'temporary_bans', 'max_posts_interval', 'count_posts_interval', 'post_wait_until')
+            'fields': ('activated_at', 'banned', 'banned_until', 'temporary_bans', 'max_posts_interval', 'count_posts_interval', 'post_wait_until', 'last_post_at')
         }),
     )
 
@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import BaseBackend
+from django.db.models import Case, Q, When
+from .models import get_cached_user
 
 UserModel = get_user_model()
 
@@ -9,10 +11,12 @@ class LoginBackend(BaseBackend):
         if not username or not password:
             return
 
-        user = UserModel.objects.filter(username=username).first()
-
-        if not user:
-            user = UserModel.objects.filter(email=username).first()
+        # emails always have an @, usernames only may, so the username match takes precedence
+        if '@' in username:
+            user = UserModel.objects.filter(Q(username__iexact=username) | Q(email__iexact=username)).order_by(
+                Case(When(username__iexact=username, then=0), default=1)).first()
+        else:
+            user = UserModel.objects.filter(username=username).first()
 
         if not user or not user.check_password(password):
             return
@@ -20,7 +24,4 @@ class LoginBackend(BaseBackend):
         return user
 
     def get_user(self, id):
-        try:
-            return UserModel.objects.get(pk=id)
-        except UserModel.DoesNotExist:
-            return None
+        return get_cached_user(id)
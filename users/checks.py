@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+LOCAL_CACHE_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',
+                        'django.core.cache.backends.dummy.DummyCache')
+
+
+def is_local_cache(alias='default'):
+    return settings.CACHES[alias]['BACKEND'] in LOCAL_CACHE_BACKENDS
+
+
+@register(Tags.caches)
+def check_user_cache(app_configs, **kwargs):
+    # invalidations from other workers and Celery never reach a cache kept in the process memory
+    if settings.USER_CACHE_TIMEOUT and is_local_cache():
+        return [Error('USER_CACHE_TIMEOUT requires a cache shared by all the processes.',
+                      hint='Set CACHE_URL to a shared backend, like Redis or Memcached, or '
+                      'USER_CACHE_TIMEOUT to 0.', id='users.E001')]
+
+    return []
@@ -4,8 +4,9 @@ from django.contrib.auth import password_validation, authenticate, get_user_mode
 from django.contrib.auth.models import Group
 from django.contrib.admin import widgets
 from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
 from django.utils import timezone
-from base.utils import resized_img
+from base.utils import resized_img, validate_img_pixels
 from emails.models import create_change_email_confirmation
 from .models import validate_user
 
@@ -151,12 +152,15 @@ class AccountForm(forms.ModelForm):
                 raise ValidationError(
                     f'File does not have an approved format: {formats}')
 
+            if isinstance(profile_pic, UploadedFile):
+                validate_img_pixels(profile_pic)
+
         return profile_pic
 
     def save(self, commit=True):
         profile_pic = self.cleaned_data.get('profile_pic')
 
-        if profile_pic and profile_pic != UserModel.DEFAULT_PROFILE_PIC:
+        if isinstance(profile_pic, UploadedFile):
             resized_img(profile_pic, self.instance.profile_pic.file,
                         settings.PROFILE_PIC_SIZE)
 
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+# Django 3.1 has no functional indexes. __iexact lookups compile to UPPER(column::text) = UPPER(value)
+# on PostgreSQL, so the indexes use the same expression to be picked by the planner.
+INDEXES = [
+    ('users_user_username_upper_idx', 'username'),
+    ('users_user_email_upper_idx', 'email'),
+]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('users', '0002_user_profile_pic_renditions'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            f'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {name} ON users_user (UPPER({column}::text));',
+            f'DROP INDEX CONCURRENTLY IF EXISTS {name};') for name, column in INDEXES
+    ]
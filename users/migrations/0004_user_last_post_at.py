@@ -0,0 +1,29 @@
+# Generated by Django 3.1.6 on 2026-10-18 15:20
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+
+
+def set_last_post_at(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Post = apps.get_model('posts', 'Post')
+    last_post_at = Post.objects.filter(author=OuterRef('pk')).order_by().values(
+        'author').annotate(last_post_at=Max('created_at')).values('last_post_at')
+    User.objects.update(last_post_at=Subquery(last_post_at))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_upper_username_email_idx'),
+        ('posts', '0007_post_meme_processed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='last_post_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(set_last_post_at, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,19 @@
 import os
-from random import randint
-from django.db import models
-from django.db.models.signals import post_save, pre_save, pre_delete
+import secrets
+from django.db import models, transaction, IntegrityError
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.signals import post_save, pre_save, pre_delete, post_delete, m2m_changed
 from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth.models import BaseUserManager, AbstractBaseUser, Group
 from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.contrib.postgres.fields import ArrayField
 from django.core.validators import MinLengthValidator, MaxValueValidator
+from django.core.cache import cache
 from django.core.files.storage import default_storage
 from django.utils.crypto import salted_hmac
+from base.renditions import delete_renditions
+from .tasks import create_profile_pic_renditions
 
 
 class UserManager(BaseUserManager):
@@ -68,9 +73,9 @@ class UserManager(BaseUserManager):
             kwargs['email__iexact'] = kwargs['email']
             del kwargs['email']
 
-    def filter(self, **kwargs):
+    def filter(self, *args, **kwargs):
         self._replace_kwargs(kwargs)
-        return super().filter(**kwargs)
+        return super().filter(*args, **kwargs)
 
 
 def _profile_pic_path(instance, filename):
@@ -81,12 +86,17 @@ def _profile_pic_path(instance, filename):
 class User(AbstractBaseUser):
     DEFAULT_PROFILE_PIC = 'default_profile_pic.jpg'
     PROFILE_PICS_FOLDER = 'profile_pics'
+    LOGIN_ID_ATTEMPTS = 5
+    TRACKED_FIELDS = ('profile_pic', 'profile_pic_renditions',
+                      'delete_requested_at')
 
     email = models.EmailField(unique=True)
     username = models.CharField(max_length=20, unique=True, validators=[
                                 UnicodeUsernameValidator(), MinLengthValidator(4)])
     profile_pic = models.ImageField(
         default=DEFAULT_PROFILE_PIC, upload_to=_profile_pic_path)
+    profile_pic_renditions = ArrayField(
+        models.PositiveSmallIntegerField(), default=list, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     activated_at = models.DateTimeField(blank=True, null=True)
     banned = models.BooleanField(default=False)
@@ -98,6 +108,7 @@ class User(AbstractBaseUser):
         default=settings.MIN_MAX_CONSECUTIVE_POSTS, validators=[MaxValueValidator(settings.MAX_MAX_CONSECUTIVE_POSTS)])
     count_posts_interval = models.PositiveSmallIntegerField(default=0)
     post_wait_until = models.DateTimeField(blank=True, null=True)
+    last_post_at = models.DateTimeField(blank=True, null=True)
     delete_requested_at = models.DateTimeField(blank=True, null=True)
     deleted = models.BooleanField(default=False)
 
@@ -106,36 +117,146 @@ class User(AbstractBaseUser):
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['email']
 
-    def get_rand_id(self):
-        user_count = User.objects.count()
+    @staticmethod
+    def get_rand_id():
+        # any positive BIGINT, collisions are left to the unique constraint
+        return secrets.randbelow(2 ** 63 - 1) + 1
 
-        while True:
-            rand_id = randint(1, int(1e10) + user_count)
+    def _save_new_login_id(self, *args, **kwargs):
+        for attempt in range(User.LOGIN_ID_ATTEMPTS):
+            self.login_id = self.get_rand_id()
+
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                if attempt == User.LOGIN_ID_ATTEMPTS - 1 or \
+                        not User.objects.filter(login_id=self.login_id).exists():
+                    raise
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+
+        if all(field in field_names for field in User.TRACKED_FIELDS):
+            instance._saved_state = instance._get_state()
+
+        return instance
+
+    def _get_state(self):
+        state = {field: getattr(self, field) for field in User.TRACKED_FIELDS}
+        state['profile_pic'] = self.profile_pic.name
+        state['profile_pic_renditions'] = list(self.profile_pic_renditions)
+        return state
+
+    def get_saved_state(self):
+        if not hasattr(self, '_saved_state'):
+            self._saved_state = None
+
+            if self.id:
+                self._saved_state = User.objects.filter(
+                    id=self.id).values(*User.TRACKED_FIELDS).first()
+
+        return self._saved_state
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using, fields)
+
+        if fields is None:
+            self._saved_state = self._get_state()
+        elif hasattr(self, '_saved_state'):
+            del self._saved_state
 
-            if not User.objects.filter(login_id=rand_id).first():
-                return rand_id
+    def _get_update_fields(self, update_fields):
+        update_fields = set(update_fields)
+
+        # the pre_save handler clears the renditions of a replaced picture
+        if 'profile_pic' in update_fields:
+            update_fields.add('profile_pic_renditions')
+
+        return update_fields
 
     def save(self, *args, **kwargs):
-        if not self.login_id:
-            self.login_id = self.get_rand_id()
+        update_fields = kwargs.get('update_fields')
 
-        super().save(*args, **kwargs)
+        if update_fields is not None:
+            update_fields = kwargs['update_fields'] = self._get_update_fields(
+                update_fields)
 
-    def increase_post_count(self):
-        last_post = self.posts.order_by('-created_at').first()
+        # a new login_id logs the banned user out, as it invalidates the session hash
+        if not self.login_id or (self.is_banned and (update_fields is None or 'login_id' in update_fields)):
+            self._save_new_login_id(*args, **kwargs)
+        else:
+            super().save(*args, **kwargs)
+
+        state = self._get_state()
+
+        if update_fields is not None and getattr(self, '_saved_state', None):
+            state = {field: state[field] if field in update_fields else value
+                     for field, value in self._saved_state.items()}
 
-        if last_post and last_post.created_at + timezone.timedelta(seconds=settings.POST_WAITING_INTERVAL) <= timezone.now():
+        self._saved_state = state
+
+    def increase_post_count(self):
+        now = timezone.now()
+        interval = timezone.timedelta(seconds=settings.POST_WAITING_INTERVAL)
+        # the counter restarts when the last post is older than the waiting interval
+        reset = Q(last_post_at__isnull=True) | Q(last_post_at__lte=now - interval)
+        limit = (reset & Q(max_posts_interval__lte=1)) | (
+            ~reset & Q(count_posts_interval__gte=F('max_posts_interval') - 1))
+        User.objects.filter(id=self.id).update(
+            count_posts_interval=Case(When(limit, then=Value(0)), When(reset, then=Value(1)),
+                                      default=F('count_posts_interval') + 1,
+                                      output_field=models.PositiveSmallIntegerField()),
+            post_wait_until=Case(When(limit, then=Value(now + interval)), default=F('post_wait_until'),
+                                 output_field=models.DateTimeField()),
+            last_post_at=now)
+        invalidate_cached_users([self.id])
+
+        # same transitions on the loaded instance
+        if not self.last_post_at or self.last_post_at <= now - interval:
             self.count_posts_interval = 0
 
         self.count_posts_interval += 1
+        self.last_post_at = now
 
         if self.count_posts_interval >= self.max_posts_interval:
-            self.post_wait_until = timezone.now() + \
-                timezone.timedelta(seconds=settings.POST_WAITING_INTERVAL)
+            self.post_wait_until = now + interval
             self.count_posts_interval = 0
 
+    def get_group_names(self):
+        if not hasattr(self, '_group_names'):
+            self._group_names = self._load_group_names()
+
+        return self._group_names
+
+    def _load_group_names(self):
+        if not self.id:
+            return frozenset()
+
+        timeout = settings.USER_GROUPS_CACHE_TIMEOUT
+        key = get_user_groups_cache_key(self.id, self.login_id)
+
+        if timeout:
+            group_names = cache.get(key)
+
+            if group_names is not None:
+                return group_names
+
+        group_names = frozenset(self.groups.values_list('name', flat=True))
+
+        if timeout:
+            cache.set(key, group_names, timeout)
+
+        return group_names
+
+    def reset_group_names(self):
+        if hasattr(self, '_group_names'):
+            del self._group_names
+
     def has_group(self, group):
-        return self.groups.filter(name=group).exists()
+        return group in self.get_group_names()
 
     def has_perm(self, perm, obj=None):
         return True
@@ -144,13 +265,16 @@ class User(AbstractBaseUser):
         return True
 
     def get_session_auth_hash(self):
-        key_salt = settings.SECRET_KEY
+        # kept with the login_id it was computed from, so cached users skip the HMAC
+        if getattr(self, '_session_auth_hash', (None, None))[0] != self.login_id:
+            key_salt = settings.SECRET_KEY
+            self._session_auth_hash = (self.login_id, salted_hmac(
+                key_salt,
+                f'{self.login_id}',
+                algorithm='sha256',
+            ).hexdigest())
 
-        return salted_hmac(
-            key_salt,
-            f'{self.login_id}',
-            algorithm='sha256',
-        ).hexdigest()
+        return self._session_auth_hash[1]
 
     @property
     def is_staff(self):
@@ -164,10 +288,13 @@ class User(AbstractBaseUser):
     def is_active(self):
         return self.activated_at is not None
 
+    @property
+    def is_banned(self):
+        return self.banned or bool(self.banned_until and self.banned_until > timezone.now())
+
     @property
     def group_names(self):
-        names = [group.name for group in self.groups.order_by('name')]
-        return ', '.join(names)
+        return ', '.join(sorted(self.get_group_names()))
 
     @property
     def post_count(self):
@@ -187,6 +314,58 @@ class GroupUser(models.Model):
         unique_together = ('user', 'group')
 
 
+def get_user_groups_cache_key(user_id, login_id):
+    return f'user:groups:{user_id}:{login_id}'
+
+
+def get_user_cache_key(user_id):
+    return f'user:{user_id}'
+
+
+def get_cached_user(user_id):
+    timeout = settings.USER_CACHE_TIMEOUT
+
+    if not timeout:
+        return User.objects.filter(pk=user_id).first()
+
+    key = get_user_cache_key(user_id)
+    user = cache.get(key)
+
+    if user is not None:
+        return user
+
+    user = User.objects.filter(pk=user_id).first()
+
+    if user:
+        if settings.USER_CACHE_GROUP_NAMES:
+            user.get_group_names()
+
+        user.get_session_auth_hash()
+        cache.set(key, user, timeout)
+
+    return user
+
+
+def invalidate_cached_users(user_ids):
+    if not settings.USER_CACHE_TIMEOUT or not user_ids:
+        return
+
+    keys = [get_user_cache_key(_) for _ in user_ids]
+    cache.delete_many(keys)
+    # a concurrent request may cache the old row again until the transaction commits
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_user_groups(user_ids):
+    invalidate_cached_users(user_ids)
+
+    if not settings.USER_GROUPS_CACHE_TIMEOUT or not user_ids:
+        return
+
+    users = User.objects.filter(id__in=user_ids).values_list('id', 'login_id')
+    cache.delete_many([get_user_groups_cache_key(*user) for user in users])
+
+
 def validate_user(user, exception_class=ValueError, exception_messages={}):
     if not user:
         msg = exception_messages.get('user_not_found', 'User not found.')
@@ -236,14 +415,6 @@ def __create_activation_email(sender, instance, created, **kwargs):
     create_activation_email(instance)
 
 
-def delete_user_profile_pic(user):
-    if user.profile_pic == User.DEFAULT_PROFILE_PIC:
-        return
-
-    if default_storage.exists(user.profile_pic.name):
-        default_storage.delete(user.profile_pic.name)
-
-
 def cancel_delete_account(current_user, token):
     user = get_user_from_token(
         token, 'cancel-delete-account', settings.ACCOUNT_DELETION_INTERVAL, validate=False)
@@ -261,35 +432,72 @@ def cancel_delete_account(current_user, token):
     user.save()
 
 
-def __delete_old_profile_pic_pre_save(sender, instance, **kwargs):
-    current_user = User.objects.filter(id=instance.id).first()
+def __user_changes_pre_save(sender, instance, update_fields=None, **kwargs):
+    from emails.models import create_delete_account_email
+    saved_state = instance.get_saved_state()
 
-    if not current_user or instance.profile_pic == current_user.profile_pic:
+    if not saved_state:
         return
 
-    delete_user_profile_pic(current_user)
+    # fields left out of update_fields are not written, so their changes are ignored
+    if (update_fields is None or 'profile_pic' in update_fields) and \
+            instance.profile_pic != saved_state['profile_pic']:
+        _delete_profile_pics(
+            [(saved_state['profile_pic'], saved_state['profile_pic_renditions'])])
+        instance.profile_pic_renditions = []
+
+    if (update_fields is None or 'delete_requested_at' in update_fields) and \
+            not saved_state['delete_requested_at'] and instance.delete_requested_at:
+        create_delete_account_email(instance)
+
+
+def __create_profile_pic_renditions(sender, instance, created, **kwargs):
+    if settings.TEST_MODE or instance.profile_pic == User.DEFAULT_PROFILE_PIC:
+        return
+
+    # the saved state is only replaced once save returns
+    saved_state = instance.get_saved_state()
+
+    if not saved_state or saved_state['profile_pic'] == instance.profile_pic.name:
+        return
+
+    transaction.on_commit(
+        lambda: create_profile_pic_renditions.delay(instance.id))
 
 
 def __delete_old_profile_pic_pre_delete(sender, instance, **kwargs):
-    current_user = User.objects.filter(id=instance.id).first()
+    saved_state = instance.get_saved_state()
 
-    if not current_user:
+    if not saved_state:
         return
 
-    delete_user_profile_pic(current_user)
+    _delete_profile_pics(
+        [(saved_state['profile_pic'], saved_state['profile_pic_renditions'])])
 
 
-def __logout_banned_user(sender, instance, **kwargs):
-    if instance.banned or (instance.banned_until and instance.banned_until > timezone.now()):
-        instance.login_id = instance.get_rand_id()
+def __invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_cached_users([instance.id])
 
 
-def __delete_account(sender, instance, **kwargs):
-    from emails.models import create_delete_account_email
-    current_user = User.objects.filter(id=instance.id).first()
+def __reset_group_names(sender, instance, **kwargs):
+    if GroupUser.user.is_cached(instance):
+        instance.user.reset_group_names()
 
-    if current_user and not current_user.delete_requested_at and instance.delete_requested_at:
-        create_delete_account_email(instance)
+    invalidate_user_groups([instance.user_id])
+
+
+def __reset_group_names_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            instance.reset_group_names()
+            invalidate_user_groups([instance.id])
+    elif action == 'pre_clear':
+        instance._cleared_user_ids = list(
+            instance.user_set.values_list('id', flat=True))
+    elif action == 'post_clear':
+        invalidate_user_groups(getattr(instance, '_cleared_user_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        invalidate_user_groups(pk_set)
 
 
 def activate_user(token):
@@ -328,43 +536,78 @@ def change_user_email(current_user, current_email_token, new_email_token):
 
 
 def get_not_activated_users_expired_links():
-    now = timezone.now()
-    users = User.objects.filter(activated_at=None).order_by('created_at')
-    expired_users = []
+    expired_at = timezone.now() - timezone.timedelta(seconds=settings.ACCOUNT_ACTIVATION_EXPIRATION_TIME)
+    return User.objects.filter(activated_at=None, created_at__lte=expired_at).order_by('created_at')
 
-    for user in users:
-        if user.created_at + timezone.timedelta(seconds=settings.ACCOUNT_ACTIVATION_EXPIRATION_TIME) <= now:
-            expired_users.append(user)
 
-    return expired_users
+def get_users_execute_delete_request():
+    requested_at = timezone.now() - timezone.timedelta(seconds=settings.ACCOUNT_DELETION_INTERVAL)
+    return User.objects.filter(
+        delete_requested_at__lte=requested_at, deleted=False).order_by('delete_requested_at')
 
 
-def get_users_execute_delete_request():
-    now = timezone.now()
-    users = User.objects.filter(
-        delete_requested_at__isnull=False, deleted=False).order_by('delete_requested_at')
-    delete_request_users = []
+def _delete_profile_pics(profile_pics):
+    for name, renditions in profile_pics:
+        if name != User.DEFAULT_PROFILE_PIC and default_storage.exists(name):
+            default_storage.delete(name)
+
+        delete_renditions(name, renditions)
 
-    for user in users:
-        if user.delete_requested_at + timezone.timedelta(seconds=settings.ACCOUNT_DELETION_INTERVAL) <= now:
-            delete_request_users.append(user)
 
-    return delete_request_users
+def _get_users_profile_pics(users):
+    return list(users.exclude(profile_pic=User.DEFAULT_PROFILE_PIC).values_list(
+        'profile_pic', 'profile_pic_renditions'))
+
+
+def delete_users(users):
+    with transaction.atomic():
+        profile_pics = _get_users_profile_pics(users)
+        # the pre_delete handler finds the default picture and skips the storage
+        users.update(profile_pic=User.DEFAULT_PROFILE_PIC,
+                     profile_pic_renditions=[])
+        count = users.delete()[1].get(User._meta.label, 0)
+
+    _delete_profile_pics(profile_pics)
+    return count
+
+
+def execute_users_delete_request(users):
+    from emails.models import Email
+    from posts.models import Post
+
+    with transaction.atomic():
+        users = list(users)
+        ids = [user.id for user in users]
+        profile_pics = _get_users_profile_pics(User.objects.filter(id__in=ids))
+        Post.objects.filter(author__in=ids).delete()
+        Email.objects.filter(recipient__in=ids).delete()
+
+        for user in users:
+            user.profile_pic = User.DEFAULT_PROFILE_PIC
+            user.profile_pic_renditions = []
+            user.login_id = user.get_rand_id()
+            user.email = f'deleted.user.{user.id}@djangomemes.com'
+            user.deleted = True
+
+        User.objects.bulk_update(
+            users, ['profile_pic', 'profile_pic_renditions', 'login_id', 'email', 'deleted'])
+        invalidate_cached_users(ids)
+
+    _delete_profile_pics(profile_pics)
+    return len(users)
 
 
 def execute_user_delete_request(user):
-    user.posts.all().delete()
-    user.emails.all().delete()
-    user.profile_pic = user.DEFAULT_PROFILE_PIC
-    delete_user_profile_pic(user)
-    user.login_id = user.get_rand_id()
-    user.email = f'deleted.user.{user.id}@djangomemes.com'
-    user.deleted = True
-    user.save()
+    execute_users_delete_request(User.objects.filter(id=user.id))
+    user.refresh_from_db()
 
 
 post_save.connect(__create_activation_email, sender=User)
-pre_save.connect(__delete_old_profile_pic_pre_save, sender=User)
-pre_save.connect(__logout_banned_user, sender=User)
+pre_save.connect(__user_changes_pre_save, sender=User)
+post_save.connect(__create_profile_pic_renditions, sender=User)
 pre_delete.connect(__delete_old_profile_pic_pre_delete, sender=User)
-pre_save.connect(__delete_account, sender=User)
+post_save.connect(__invalidate_cached_user, sender=User)
+post_delete.connect(__invalidate_cached_user, sender=User)
+post_save.connect(__reset_group_names, sender=GroupUser)
+post_delete.connect(__reset_group_names, sender=GroupUser)
+m2m_changed.connect(__reset_group_names_m2m, sender=GroupUser)
@@ -0,0 +1,38 @@
+from enum import Enum
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.core.files.storage import default_storage
+from base.renditions import create_renditions
+
+logger = get_task_logger(__name__)
+
+
+class RenditionsProfilePicResponses(Enum):
+    SUCCESS = 0
+    USER_NOT_FOUND = 1
+    PROFILE_PIC_NOT_FOUND = 2
+
+
+@shared_task(autoretry_for=(Exception,), retry_kwargs={'max_retries': 2}, default_retry_delay=5 * 60)
+def create_profile_pic_renditions(id):
+    from posts.feed_cache import invalidate_feed
+    from .models import User, invalidate_cached_users
+    user = User.objects.filter(id=id).first()
+
+    if not user:
+        logger.info(f'User with id {id} not found...')
+        return RenditionsProfilePicResponses.USER_NOT_FOUND.name
+
+    if user.profile_pic == User.DEFAULT_PROFILE_PIC or not default_storage.exists(user.profile_pic.name):
+        logger.info(f'File {user.profile_pic.name} not found...')
+        return RenditionsProfilePicResponses.PROFILE_PIC_NOT_FOUND.name
+
+    widths = create_renditions(
+        user.profile_pic.name, settings.PROFILE_PIC_RENDITION_WIDTHS)
+    # the picture may have been replaced while the renditions were created
+    User.objects.filter(id=id, profile_pic=user.profile_pic.name).update(
+        profile_pic_renditions=widths)
+    invalidate_cached_users([user.id])
+    invalidate_feed(user.id)
+    return RenditionsProfilePicResponses.SUCCESS.name
@@ -1,9 +1,11 @@
+from itertools import repeat
 import pytest
 from pytest_django.asserts import assertTemplateUsed
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError
 from django.utils import timezone
 from django.urls import reverse
-from .test_utils import create_activated_test_user
+from .test_utils import create_test_user, create_activated_test_user
 
 UserModel = get_user_model()
 
@@ -67,3 +69,42 @@ def test_banned_until_expired(client, valid_user_1):
     assert user.banned_until
     assert old_login_id == user.login_id
     check_login(client)
+
+
+@pytest.mark.django_db
+def test_login_id_collision(monkeypatch, valid_user_1, valid_user_2):
+    user1 = create_test_user(valid_user_1)
+    login_ids = iter([user1.login_id, 2 ** 62])
+    monkeypatch.setattr('users.models.secrets.randbelow',
+                        lambda upper: next(login_ids) - 1)
+    user2 = create_test_user(valid_user_2)
+    assert user2.login_id == 2 ** 62
+    login_ids = repeat(user1.login_id)
+    user2.banned = True
+
+    with pytest.raises(IntegrityError):
+        user2.save()
+
+
+@pytest.mark.django_db
+def test_ban_query_count(django_assert_num_queries, valid_user_1):
+    user = create_test_user(valid_user_1)
+    user.banned = True
+
+    # savepoint, update and release, no count or probing queries
+    with django_assert_num_queries(3):
+        user.save()
+
+
+@pytest.mark.django_db
+def test_banned_update_fields(client, valid_user_1):
+    user = create_activated_test_user(valid_user_1)
+    peform_login(client, user)
+    old_login_id = user.login_id
+    user.temporary_bans += 1
+    user.banned_until = timezone.now() + timezone.timedelta(seconds=60)
+    # same fields saved by ban_post_denied_author
+    user.save(update_fields=['temporary_bans', 'banned', 'banned_until', 'login_id'])
+    assert old_login_id != user.login_id
+    assert UserModel.objects.get(id=user.id).login_id == user.login_id
+    check_logout(client)
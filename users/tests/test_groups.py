@@ -0,0 +1,63 @@
+import pytest
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from .test_utils import create_test_user, create_admin_test_user
+from ..models import User, GroupUser
+
+
+@pytest.mark.django_db
+def test_group_names_loaded_once(django_assert_num_queries, valid_user_1):
+    user = create_admin_test_user(valid_user_1)
+    user = User.objects.get(id=user.id)
+
+    with django_assert_num_queries(1):
+        assert user.is_staff
+        assert not user.is_moderator
+        assert user.group_names == 'admin'
+
+
+@pytest.mark.django_db
+def test_group_names_reset_m2m(valid_user_1):
+    user = create_test_user(valid_user_1, is_active=True)
+    assert not user.is_moderator
+    group = Group.objects.create(name='moderator')
+    user.groups.add(group)
+    assert user.is_moderator
+    user.groups.remove(group)
+    assert not user.is_moderator
+    user.groups.add(group)
+    assert user.is_moderator
+    user.groups.clear()
+    assert not user.is_moderator
+
+
+@pytest.mark.django_db
+def test_group_names_reset_group_user(valid_user_1):
+    user = create_test_user(valid_user_1, is_active=True)
+    assert not user.is_moderator
+    group = Group.objects.create(name='moderator')
+    group_user = GroupUser(user=user, group=group)
+    group_user.save()
+    assert user.is_moderator
+    group_user.delete()
+    assert not user.is_moderator
+
+
+@pytest.mark.django_db
+def test_group_names_shared_cache(settings, django_assert_num_queries, valid_user_1):
+    settings.USER_GROUPS_CACHE_TIMEOUT = 60
+    cache.clear()
+    user = create_admin_test_user(valid_user_1)
+    assert User.objects.get(id=user.id).is_staff
+    user = User.objects.get(id=user.id)
+
+    with django_assert_num_queries(0):
+        assert user.is_staff
+
+    GroupUser.objects.get(user=user).delete()
+    assert not User.objects.get(id=user.id).is_staff
+    group = Group.objects.get(name='admin')
+    group.user_set.add(user)
+    assert User.objects.get(id=user.id).is_staff
+    group.user_set.clear()
+    assert not User.objects.get(id=user.id).is_staff
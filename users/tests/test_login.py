@@ -1,5 +1,7 @@
 import pytest
 from time import sleep
+from django.contrib.auth import authenticate
+from django.db import IntegrityError, transaction
 from django.urls import reverse
 from base.utils import inverse_case
 from .test_utils import (create_test_user, create_activated_test_user,
@@ -118,3 +120,32 @@ def test_user_deleted(client, valid_user_1):
     }
 
     perform_login(client, user_data, 'users:login')
+
+
+@pytest.mark.django_db
+def test_login_single_query(django_assert_num_queries, valid_user_1):
+    create_activated_test_user(valid_user_1)
+
+    for username in (valid_user_1['username'], inverse_case(valid_user_1['email'])):
+        with django_assert_num_queries(1):
+            assert authenticate(username=username, password=valid_user_1['password'])
+
+
+@pytest.mark.django_db
+def test_login_username_with_at(valid_user_1, valid_user_2):
+    user1 = create_activated_test_user(valid_user_1)
+    user2 = create_activated_test_user(dict(valid_user_2, username=valid_user_1['email']))
+    assert authenticate(username=valid_user_1['email'], password=valid_user_2['password']) == user2
+    assert authenticate(username=valid_user_1['username'], password=valid_user_1['password']) == user1
+
+
+@pytest.mark.django_db
+def test_case_insensitive_unique(valid_user_1, valid_user_2):
+    create_activated_test_user(valid_user_1)
+
+    with pytest.raises(IntegrityError):
+        with transaction.atomic():
+            create_test_user(dict(valid_user_2, username=inverse_case(valid_user_1['username'])))
+
+    with pytest.raises(IntegrityError):
+        create_test_user(dict(valid_user_2, email=inverse_case(valid_user_1['email'])))
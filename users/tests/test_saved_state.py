@@ -0,0 +1,72 @@
+import os
+import pytest
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from emails.models import Email
+from .test_utils import create_test_user
+from ..models import User
+
+
+def save_test_profile_pic(user, image_file):
+    current_path = os.path.dirname(os.path.abspath(__file__))
+    image_path = os.path.join(current_path, 'images', image_file)
+    user.profile_pic.save(image_file, File(open(image_path, 'rb')))
+    return user.profile_pic.name
+
+
+@pytest.mark.django_db
+def test_saved_state_from_db(valid_user_1):
+    user = create_test_user(valid_user_1)
+    user = User.objects.get(id=user.id)
+    assert user.get_saved_state() == {
+        'profile_pic': User.DEFAULT_PROFILE_PIC,
+        'profile_pic_renditions': [],
+        'delete_requested_at': None
+    }
+
+
+@pytest.mark.django_db
+def test_save_loaded_user_query_count(django_assert_num_queries, valid_user_1):
+    user = create_test_user(valid_user_1)
+    user = User.objects.get(id=user.id)
+    user.max_posts_interval += 1
+
+    with django_assert_num_queries(1):
+        user.save(update_fields=['max_posts_interval'])
+
+    with django_assert_num_queries(1):
+        user.save()
+
+
+@pytest.mark.django_db
+def test_change_profile_pic(valid_user_1):
+    user = create_test_user(valid_user_1)
+    old_file = save_test_profile_pic(user, 'image.PNG')
+    user = User.objects.get(id=user.id)
+    user.profile_pic_renditions = [64]
+    user.save()
+    new_file = save_test_profile_pic(user, 'image.JPG')
+    assert not default_storage.exists(old_file)
+    assert default_storage.exists(new_file)
+    assert user.profile_pic_renditions == []
+    assert user.get_saved_state()['profile_pic'] == new_file
+
+
+@pytest.mark.django_db
+def test_update_fields_skip_untracked_changes(valid_user_1):
+    user = create_test_user(valid_user_1)
+    old_file = save_test_profile_pic(user, 'image.PNG')
+    user = User.objects.get(id=user.id)
+    user.profile_pic = User.DEFAULT_PROFILE_PIC
+    user.delete_requested_at = timezone.now()
+    emails = Email.objects.count()
+    user.save(update_fields=['max_posts_interval'])
+    assert default_storage.exists(old_file)
+    assert Email.objects.count() == emails
+    assert user.get_saved_state()['profile_pic'] == old_file
+    user.save(update_fields=['delete_requested_at'])
+    assert Email.objects.count() == emails + 1
+    user.save()
+    assert not default_storage.exists(old_file)
+    assert Email.objects.count() == emails + 1
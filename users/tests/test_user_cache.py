@@ -0,0 +1,77 @@
+import pytest
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.checks import run_checks
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from .test_utils import create_test_user
+from ..backends import LoginBackend
+from ..models import User
+
+
+@pytest.fixture
+def user_cache(settings):
+    settings.USER_CACHE_TIMEOUT = 60
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_cached_user(django_assert_num_queries, user_cache, valid_user_1):
+    user = create_test_user(valid_user_1, is_active=True)
+    backend = LoginBackend()
+    assert backend.get_user(user.id) == user
+
+    with django_assert_num_queries(0):
+        cached_user = backend.get_user(user.id)
+        assert not cached_user.is_moderator
+        assert cached_user.get_session_auth_hash() == user.get_session_auth_hash()
+
+    user.max_posts_interval += 1
+    user.save()
+    assert backend.get_user(user.id).max_posts_interval == user.max_posts_interval
+    user.banned = True
+    user.save()
+    assert backend.get_user(user.id).login_id == user.login_id
+    Group.objects.create(name='moderator').user_set.add(user)
+    assert backend.get_user(user.id).is_moderator
+    User.objects.filter(id=user.id).delete()
+    assert backend.get_user(user.id) is None
+
+
+@pytest.mark.django_db
+def test_page_view_skips_user_query(client, user_cache, valid_user_1):
+    user = create_test_user(valid_user_1, is_active=True)
+    client.force_login(user)
+    client.get(reverse('users:account'))
+
+    with CaptureQueriesContext(connection) as context:
+        assert client.get(reverse('users:account')).status_code == 200
+
+    assert not [_ for _ in context.captured_queries if 'FROM "users_user"' in _['sql']]
+
+
+@pytest.mark.django_db
+def test_cache_disabled(django_assert_num_queries, settings, valid_user_1):
+    settings.USER_CACHE_TIMEOUT = 0
+    user = create_test_user(valid_user_1, is_active=True)
+    LoginBackend().get_user(user.id)
+
+    with django_assert_num_queries(1):
+        LoginBackend().get_user(user.id)
+
+
+def test_user_cache_check(settings):
+    settings.USER_CACHE_TIMEOUT = 60
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    assert [_.id for _ in run_checks(tags=['caches'])] == ['users.E001']
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache', 'LOCATION': '127.0.0.1:11211'}}
+    assert not run_checks(tags=['caches'])
+    settings.USER_CACHE_TIMEOUT = 0
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    assert not run_checks(tags=['caches'])
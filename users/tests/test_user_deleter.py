@@ -5,7 +5,9 @@ from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.core.files.images import ImageFile
 from django.core.files.storage import default_storage
-from services.user_deleter import delete_not_activated_users_expired_links, delete_users_delete_request
+from django.db import connection
+from services.user_deleter import (delete_not_activated_users_expired_links, delete_users_delete_request,
+                                   run_user_deleter, USER_DELETER_LOCK_ID)
 from posts.tests.test_utils import create_test_post
 from .test_utils import create_test_user, create_activated_test_user, create_account_delete_requested_user
 
@@ -113,3 +115,67 @@ def test_user_account_delete_request_expired_already_deleted(valid_user_1):
     assert user.email == email
     assert user.login_id == login_id
     assert user.deleted
+
+
+@pytest.mark.django_db
+def test_not_activated_users_expired_links_chunks(settings, valid_user_1):
+    settings.USER_DELETER_CHUNK_SIZE = 2
+
+    for idx in range(5):
+        user = create_test_user({**valid_user_1, 'username': f'{valid_user_1["username"]}{idx}',
+                                 'email': f'{idx}{valid_user_1["email"]}'})
+        user.created_at -= timezone.timedelta(
+            seconds=settings.ACCOUNT_ACTIVATION_EXPIRATION_TIME)
+        user.save()
+
+    user = create_test_user(valid_user_1)
+    assert delete_not_activated_users_expired_links() == 5
+    assert list(UserModel.objects.all()) == [user]
+
+
+@pytest.mark.django_db
+def test_users_delete_request_chunks(settings, valid_user_1):
+    settings.USER_DELETER_CHUNK_SIZE = 2
+    users = []
+
+    for idx in range(3):
+        user = create_account_delete_requested_user({**valid_user_1, 'username': f'{valid_user_1["username"]}{idx}',
+                                                     'email': f'{idx}{valid_user_1["email"]}'})
+        user.delete_requested_at -= timezone.timedelta(
+            seconds=settings.ACCOUNT_DELETION_INTERVAL)
+        user.save()
+        users.append(user)
+
+    assert delete_users_delete_request() == 3
+    assert delete_users_delete_request() == 0
+
+    for user in users:
+        user = UserModel.objects.get(id=user.id)
+        assert user.deleted
+        assert user.email == f'deleted.user.{user.id}@djangomemes.com'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_run_user_deleter_lock(valid_user_1):
+    user = create_test_user(valid_user_1)
+    user.created_at -= timezone.timedelta(
+        seconds=settings.ACCOUNT_ACTIVATION_EXPIRATION_TIME)
+    user.save()
+
+    other_connection = connection.get_new_connection(
+        connection.get_connection_params())
+
+    with other_connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_lock(%s)', [USER_DELETER_LOCK_ID])
+        assert run_user_deleter() is None
+        assert UserModel.objects.count() == 1
+        cursor.execute('SELECT pg_advisory_unlock(%s)',
+                       [USER_DELETER_LOCK_ID])
+
+    other_connection.close()
+
+    result = run_user_deleter()
+    assert result['expired_links'] == 1
+    assert result['delete_requests'] == 0
+    assert result['duration'] >= 0
+    assert UserModel.objects.count() == 0